@@ -3,7 +3,7 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv  # ✅ Updated
 import os
-import pandas as pd
+import time
 from pymongo import MongoClient
 from bson.objectid import ObjectId
 
@@ -14,13 +14,35 @@ load_dotenv()
 if os.environ.get("GEMINI_API_KEY") and not os.environ.get("GOOGLE_API_KEY"):
     os.environ["GOOGLE_API_KEY"] = os.environ["GEMINI_API_KEY"]
 
-from routes.chat_routes import chat_routes
+_boot_start = time.perf_counter()
+
+from services.lazy_loader import lazy_import, start_warm_up, import_report
+
+# 💤 Heavy third-party dependencies, registered first so the background warm-up
+# imports (and times) them before the modules that use them. When a request
+# imports e.g. models.orchestrator first, sklearn's cost is counted in orchestrator's time.
+for _heavy in ["pandas", "sklearn.ensemble", "langchain_core.messages", "langchain_google_genai",
+               "googleapiclient.discovery", "textblob", "torch", "transformers"]:
+    lazy_import(_heavy)
+
+from routes.chat_routes import chat_routes, question_cache
+from memory.memory_handler import memory as chat_memory
 from routes.tourism_routes import tourism_routes
-from models.orchestrator import suggest_items_orchestrator
 from insight_routes import insight_routes
 from routes.review_routes import review_routes
-from sheet_analyzer import fetch_all_google_sheet_data
-from gap_analysis import perform_gap_analysis
+from services.llm_router import router as llm_router
+from services.llm_clients import pool_stats as llm_pool_stats
+from services.singleflight import all_stats as singleflight_stats
+from services.llm_limiter import limiter as llm_limiter
+from services.deadline import with_budget, budget_from_env
+
+# 💤 Loaded on first use (or by the background warm-up below)
+pd = lazy_import("pandas")
+orchestrator = lazy_import("models.orchestrator")        # sklearn + trained models
+sheet_analyzer = lazy_import("sheet_analyzer")           # TextBlob + googleapiclient
+gap_analysis = lazy_import("gap_analysis")               # torch + transformers
+weather_service = lazy_import("services.weather_service")  # shared with the tourism routes
+tourism_service = lazy_import("services.tourism_service")
 
 # =====================================================
 # App Configuration
@@ -51,6 +73,9 @@ app.register_blueprint(review_routes, url_prefix="/api")  # ✅ Reviews backend
 # =====================================================
 OUTPUT_CSV = "output.csv"  # For food trends
 
+# ⏱️ End-to-end budget for suggestion requests (Gemini fallback included)
+SUGGEST_BUDGET = budget_from_env("SUGGEST_BUDGET_S", 15)
+
 # =====================================================
 # Root Route
 # =====================================================
@@ -61,13 +86,16 @@ def home():
         "services": {
             "chatbot": "/api/chat",
             "menu_suggestion": "/api/suggest",
+            "menu_suggestion_batch": "/api/suggest/batch",
+            "record_order": "/api/orders",
             "tourism": "/api/tourism",
             "inventory": "/api/inventory",
             "insight": "/api/insight?dish=Masala Karela",
             "reviews": "/api/reviews",
             "google_reviews": "/api/google-reviews",
             "gap_analysis": "/gap_analysis",
-            "food_trends": "/api/food-trends"
+            "food_trends": "/api/food-trends",
+            "metrics": "/api/metrics"
         }
     })
 
@@ -75,6 +103,7 @@ def home():
 # AI Radar Suggestion Route
 # =====================================================
 @app.route("/api/suggest", methods=["POST"])
+@with_budget(SUGGEST_BUDGET)
 def suggest():
     try:
         data = request.get_json()
@@ -85,16 +114,71 @@ def suggest():
         dish_name = data.get("dish_name")
         language = data.get("language", "English")
         option = data.get("option", "both")
+        engine = data.get("engine")  # optional: "rf" or "cooccurrence"
 
         if not order_date or not dish_name:
             return jsonify({"error": "Both 'order_date' and 'dish_name' are required"}), 400
+        if engine and engine not in orchestrator.ENGINES:
+            return jsonify({"error": f"'engine' must be one of {list(orchestrator.ENGINES)}"}), 400
 
-        result = suggest_items_orchestrator(order_date, dish_name, language, option)
+        result = orchestrator.suggest_items_orchestrator(order_date, dish_name, language, option, engine)
         return jsonify(result)
 
     except Exception as e:
         return jsonify({"error": "Server Error", "message": str(e)}), 500
 
+@app.route("/api/suggest/batch", methods=["POST"])
+@with_budget(SUGGEST_BUDGET)
+def suggest_batch():
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No JSON payload provided"}), 400
+
+        # Accept either a bare list or {"items": [...]}
+        items = data.get("items") if isinstance(data, dict) else data
+        if not isinstance(items, list) or not items:
+            return jsonify({"error": "'items' must be a non-empty list"}), 400
+        if len(items) > orchestrator.MAX_BATCH_ITEMS:
+            return jsonify({"error": f"At most {orchestrator.MAX_BATCH_ITEMS} items per batch"}), 400
+
+        engine = data.get("engine") if isinstance(data, dict) else None
+        if engine and engine not in orchestrator.ENGINES:
+            return jsonify({"error": f"'engine' must be one of {list(orchestrator.ENGINES)}"}), 400
+
+        results = orchestrator.suggest_items_batch(items, engine)
+        return jsonify({"results": results})
+
+    except Exception as e:
+        return jsonify({"error": "Server Error", "message": str(e)}), 500
+
+def is_name_list(value) -> bool:
+    return isinstance(value, list) and all(isinstance(v, str) and v.strip() for v in value)
+
+@app.route("/api/orders", methods=["POST"])
+def record_order():
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "No JSON payload provided"}), 400
+
+        order_date = data.get("order_date")
+        dish_name = data.get("dish_name")
+        toppings = data.get("toppings", [])
+        addons = data.get("addons", [])
+
+        if not isinstance(order_date, str) or not isinstance(dish_name, str) \
+                or not order_date.strip() or not dish_name.strip():
+            return jsonify({"error": "Both 'order_date' and 'dish_name' are required"}), 400
+        if not is_name_list(toppings) or not is_name_list(addons):
+            return jsonify({"error": "'toppings' and 'addons' must be lists of non-empty strings"}), 400
+
+        result = orchestrator.record_order(order_date, dish_name, toppings, addons)
+        return jsonify({"status": "recorded", **result})
+
+    except Exception as e:
+        return jsonify({"error": "Server Error", "message": str(e)}), 500
+
 # =====================================================
 # Inventory Routes
 # =====================================================
@@ -161,7 +245,7 @@ def delete_inventory_item(item_id):
 @app.route("/api/google-reviews", methods=["GET"])
 def google_reviews():
     try:
-        data = fetch_all_google_sheet_data()
+        data = sheet_analyzer.fetch_all_google_sheet_data()
         return jsonify({
             "total_responses": len(data),
             "recent_reviews": data[-10:][::-1]  # Last 10 reviews
@@ -176,7 +260,7 @@ def google_reviews():
 def gap_analysis_route():
     try:
         vendor_id = request.args.get("vendorId", "vendor_01")
-        result = perform_gap_analysis(vendor_id)
+        result = gap_analysis.perform_gap_analysis(vendor_id)
         return jsonify({"status": "success", "data": result})
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
@@ -193,11 +277,54 @@ def food_trends():
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+# =====================================================
+# Metrics Route
+# =====================================================
+@app.route("/api/metrics", methods=["GET"])
+def metrics():
+    return jsonify({
+        "advisory_cache": orchestrator.advisory_cache.stats() if orchestrator.loaded else None,
+        "llm_router": llm_router.stats(),
+        "llm_clients": llm_pool_stats(),
+        "llm_singleflight": singleflight_stats(),
+        "llm_admission": llm_limiter.stats(),
+        "chat_cache": question_cache.stats(),
+        "chat_memory": chat_memory.stats(),
+        "weather_cache": {
+            "historical": weather_service.historical_cache.stats(),
+            "forecast": weather_service.forecast_cache.stats()
+        } if weather_service.loaded else None,
+        "tourism": tourism_service.stats() if tourism_service.loaded else None,
+        "boot_seconds": BOOT_SECONDS,
+        "imports": import_report()
+    })
+
+# =====================================================
+# Background Warm-up
+# =====================================================
+BOOT_SECONDS = round(time.perf_counter() - _boot_start, 3)
+WARM_UP = os.environ.get("WARM_UP", "True").lower() == "true"
+# 🌙 Keep tourism responses for the top cities and next days warm (see services/tourism_service.py).
+# Only one worker per host runs it (lock file); set TOURISM_CACHE_PATH so every worker shares the results.
+TOURISM_PRECOMPUTE = os.environ.get("TOURISM_PRECOMPUTE", "False").lower() == "true"
+DEBUG_MODE = os.environ.get("DEBUG", "True").lower() == "true"
+
 # =====================================================
 # Run Flask App
 # =====================================================
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
-    debug_mode = os.environ.get("DEBUG", "True").lower() == "true"
-    print(f"🚀 Starting Combined Flask Backend on port {port} (debug={debug_mode})")
-    app.run(host="0.0.0.0", port=port, debug=debug_mode)
+    print(f"🚀 Starting Combined Flask Backend on port {port} (debug={DEBUG_MODE}, boot={BOOT_SECONDS}s)")
+    # With the debug reloader, only the serving child process warms up
+    if not DEBUG_MODE or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        if WARM_UP:
+            start_warm_up()
+        if TOURISM_PRECOMPUTE:
+            tourism_service.start_precompute_scheduler()
+    app.run(host="0.0.0.0", port=port, debug=DEBUG_MODE)
+else:
+    # Imported by a WSGI server: warm up in the background while the worker starts serving
+    if WARM_UP:
+        start_warm_up()
+    if TOURISM_PRECOMPUTE:
+        tourism_service.start_precompute_scheduler()
@@ -1,5 +1,8 @@
 from flask import Blueprint, request, jsonify
-from insight_backend import get_insight_for_dish
+from services.lazy_loader import lazy_import
+
+# 💤 insight_backend pulls in pandas; load it on the first insight request
+insight_backend = lazy_import("insight_backend")
 
 insight_routes = Blueprint("insight_routes", __name__)
 
@@ -7,7 +10,7 @@ insight_routes = Blueprint("insight_routes", __name__)
 def insight():
     dish = request.args.get("dish", "Masala Karela")
     try:
-        result = get_insight_for_dish(dish)
+        result = insight_backend.get_insight_for_dish(dish)
         if "error" in result:
             return jsonify({"error": result["error"]}), 404
         return jsonify(result)
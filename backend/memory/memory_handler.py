@@ -1,17 +1,290 @@
 # memory/memory_handler.py
 
-from langchain_community.chat_message_histories import ChatMessageHistory
+import os
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 
-history = ChatMessageHistory()
+from services.lazy_loader import lazy_import
+from services.llm_router import router
+from services.llm_limiter import BACKGROUND
 
-def add_message(role: str, content: str):
+messages = lazy_import("langchain_core.messages")
+
+# --------------------------------------------------
+# ⚙️ Settings
+# --------------------------------------------------
+MAX_MESSAGES = int(os.environ.get("MEMORY_MAX_MESSAGES", "12"))       # per-session window
+MAX_TOKENS = int(os.environ.get("MEMORY_MAX_TOKENS", "1500"))         # rough budget (≈ 4 chars/token)
+IDLE_TTL = int(os.environ.get("MEMORY_IDLE_MINUTES", "60")) * 60      # idle sessions are evicted
+BACKEND = os.environ.get("MEMORY_BACKEND", "memory")                  # "memory" | "sqlite"
+DB_PATH = os.environ.get(
+    "MEMORY_DB_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "chat_memory.sqlite3")
+)
+DEFAULT_SESSION = "default"
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+# --------------------------------------------------
+# 🗄️ Stores: (summary, [(role, content)]) per session
+# --------------------------------------------------
+class InMemorySessionStore:
+    def __init__(self):
+        self._sessions = {}   # session_id -> {"summary", "messages", "last_seen"}
+        self._lock = threading.Lock()
+
+    def load(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if not session:
+                return "", []
+            session["last_seen"] = time.time()
+            return session["summary"], list(session["messages"])
+
+    def update(self, session_id, fn):
+        """Atomically replace (summary, history) with fn(summary, history)."""
+        with self._lock:
+            session = self._sessions.get(session_id) or {"summary": "", "messages": []}
+            summary, history = fn(session["summary"], list(session["messages"]))
+            self._sessions[session_id] = {"summary": summary, "messages": list(history), "last_seen": time.time()}
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def evict_idle(self, max_idle):
+        cutoff = time.time() - max_idle
+        with self._lock:
+            idle = [sid for sid, s in self._sessions.items() if s["last_seen"] < cutoff]
+            for sid in idle:
+                del self._sessions[sid]
+        return idle
+
+    def count(self):
+        with self._lock:
+            return len(self._sessions)
+
+
+class SQLiteSessionStore:
+    """
+    Local-file store so memory survives restarts and is shared by workers on one
+    host. Read-modify-write updates run in one BEGIN IMMEDIATE transaction, so
+    two workers appending to the same session never lose a message.
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Autocommit mode: transactions are opened explicitly in _transaction()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=10, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions (session_id TEXT PRIMARY KEY, summary TEXT, last_seen REAL)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS messages (session_id TEXT, position INTEGER, role TEXT, content TEXT)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, position)")
+
+    @contextmanager
+    def _transaction(self):
+        # IMMEDIATE takes the write lock up front, so a concurrent writer in another
+        # process waits (up to `timeout`) instead of interleaving its read-modify-write
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    def _read(self, db, session_id):
+        row = db.execute("SELECT summary FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        if not row:
+            return None, []
+        history = db.execute(
+            "SELECT role, content FROM messages WHERE session_id = ? ORDER BY position", (session_id,)
+        ).fetchall()
+        return row[0] or "", [tuple(m) for m in history]
+
+    def load(self, session_id):
+        with self._transaction() as db:
+            summary, history = self._read(db, session_id)
+            if summary is None:
+                return "", []
+            db.execute("UPDATE sessions SET last_seen = ? WHERE session_id = ?", (time.time(), session_id))
+            return summary, history
+
+    def update(self, session_id, fn):
+        """Atomically replace (summary, history) with fn(summary, history)."""
+        with self._transaction() as db:
+            summary, history = self._read(db, session_id)
+            summary, history = fn(summary or "", history)
+            db.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, summary, last_seen) VALUES (?, ?, ?)",
+                (session_id, summary, time.time())
+            )
+            db.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            db.executemany(
+                "INSERT INTO messages (session_id, position, role, content) VALUES (?, ?, ?, ?)",
+                [(session_id, i, role, content) for i, (role, content) in enumerate(history)]
+            )
+
+    def delete(self, session_id):
+        with self._transaction() as db:
+            db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            db.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+
+    def evict_idle(self, max_idle):
+        cutoff = time.time() - max_idle
+        with self._transaction() as db:
+            idle = [r[0] for r in db.execute("SELECT session_id FROM sessions WHERE last_seen < ?", (cutoff,))]
+            for sid in idle:
+                db.execute("DELETE FROM sessions WHERE session_id = ?", (sid,))
+                db.execute("DELETE FROM messages WHERE session_id = ?", (sid,))
+        return idle
+
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+# --------------------------------------------------
+# 🧠 Session memory
+# --------------------------------------------------
+class SessionMemory:
+    """
+    Per-session conversation window. Messages beyond MAX_MESSAGES or MAX_TOKENS
+    are dropped from the window; when a `summarizer(summary, overflow) -> str`
+    is set they are folded into a rolling summary on a background thread, so
+    the chat request never waits on the summary LLM call.
+    """
+
+    def __init__(self, store, max_messages=MAX_MESSAGES, max_tokens=MAX_TOKENS, idle_ttl=IDLE_TTL, summarizer=None):
+        self.store = store
+        self.max_messages = max_messages
+        self.max_tokens = max_tokens
+        self.idle_ttl = idle_ttl
+        self.summarizer = summarizer
+        self._last_sweep = time.time()
+        # One worker: folds apply in the order their turns were dropped
+        self._summary_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-summary")
+
+    def add_message(self, session_id, role, content):
+        overflow = []
+
+        def append(summary, history):
+            history.append((role, content))
+            while len(history) > self.max_messages or (
+                len(history) > 1 and sum(estimate_tokens(c) for _, c in history) > self.max_tokens
+            ):
+                overflow.append(history.pop(0))
+            return summary, history
+
+        self.store.update(session_id, append)
+        if overflow and self.summarizer:
+            self._summary_pool.submit(self._fold_summary, session_id, overflow)
+        self._maybe_sweep()
+
+    def _fold_summary(self, session_id, overflow, attempts=2):
+        for _ in range(attempts):
+            previous, history = self.store.load(session_id)
+            if not history:
+                return  # session was cleared meanwhile
+            try:
+                summary = self.summarizer(previous, overflow)
+            except Exception as e:
+                print(f"⚠️ Memory summary failed: {e}")
+                return
+            applied = []
+
+            def set_summary(current, history):
+                # Compare-and-set: another worker may have folded in turns meanwhile
+                if current != previous:
+                    return current, history
+                applied.append(True)
+                return summary, history
+
+            self.store.update(session_id, set_summary)
+            if applied:
+                return
+
+    def get_history(self, session_id):
+        return self.store.load(session_id)
+
+    def get_messages(self, session_id):
+        """LangChain messages for the prompt: rolling summary first, then the window."""
+        summary, history = self.store.load(session_id)
+        result = []
+        if summary:
+            result.append(messages.SystemMessage(content=f"Summary of the earlier conversation: {summary}"))
+        for role, content in history:
+            if role == "user":
+                result.append(messages.HumanMessage(content=content))
+            else:
+                result.append(messages.AIMessage(content=content))
+        self._maybe_sweep()
+        return result
+
+    def clear(self, session_id):
+        self.store.delete(session_id)
+
+    def _maybe_sweep(self):
+        now = time.time()
+        if now - self._last_sweep < 60:
+            return
+        self._last_sweep = now
+        self.store.evict_idle(self.idle_ttl)
+
+    def stats(self):
+        return {
+            "backend": type(self.store).__name__,
+            "sessions": self.store.count(),
+            "max_messages": self.max_messages,
+            "max_tokens": self.max_tokens,
+            "summaries": self.summarizer is not None,
+        }
+
+
+def llm_summarizer(summary, overflow):
+    """Fold dropped turns into a short rolling summary with the shared router."""
+    transcript = "\n".join(f"{role}: {content}" for role, content in overflow)
+    prompt = (
+        f"Current summary: {summary or '(none)'}\n\nNew conversation turns:\n{transcript}\n\n"
+        "Update the summary in at most 5 short sentences. Keep facts about the user's business."
+    )
+    return router.invoke(["gemini-2.5-flash", "gemini-1.5-flash"], [messages.HumanMessage(content=prompt)],
+                         temperature=0.2, timeout=10, priority=BACKGROUND)
+
+
+def _create_memory():
+    store = SQLiteSessionStore(DB_PATH) if BACKEND == "sqlite" else InMemorySessionStore()
+    use_summary = os.environ.get("MEMORY_SUMMARY", "False").lower() == "true"
+    return SessionMemory(store, summarizer=llm_summarizer if use_summary else None)
+
+
+memory = _create_memory()
+
+
+# --------------------------------------------------
+# Module-level helpers (kept for existing callers)
+# --------------------------------------------------
+def add_message(role: str, content: str, session_id: str = DEFAULT_SESSION):
     if role == "user":
-        history.add_user_message(content)
+        memory.add_message(session_id, "user", content)
     elif role == "bot":
-        history.add_ai_message(content)
+        memory.add_message(session_id, "bot", content)
 
-def get_memory_messages():
-    return history.messages
+def get_memory_messages(session_id: str = DEFAULT_SESSION):
+    return memory.get_messages(session_id)
 
-def clear_memory():
-    history.clear()
\ No newline at end of file
+def clear_memory(session_id: str = DEFAULT_SESSION):
+    memory.clear(session_id)
@@ -0,0 +1,111 @@
+# models/cooccurrence.py
+
+import threading
+
+import numpy as np
+
+
+class _CountTable:
+    """Context x label order counts in a growable uint32 array."""
+
+    def __init__(self, rows=64, cols=16):
+        self.rows = {}          # context key -> row
+        self.labels = {}        # label -> column
+        self.label_names = []
+        self.counts = np.zeros((rows, cols), dtype=np.uint32)
+        self.totals = np.zeros(rows, dtype=np.uint32)
+
+    def _row(self, key):
+        row = self.rows.get(key)
+        if row is None:
+            row = self.rows[key] = len(self.rows)
+            if row >= self.counts.shape[0]:
+                self.counts = np.vstack([self.counts, np.zeros_like(self.counts)])
+                self.totals = np.concatenate([self.totals, np.zeros_like(self.totals)])
+        return row
+
+    def _col(self, label):
+        col = self.labels.get(label)
+        if col is None:
+            col = self.labels[label] = len(self.label_names)
+            self.label_names.append(label)
+            if col >= self.counts.shape[1]:
+                self.counts = np.hstack([self.counts, np.zeros_like(self.counts)])
+        return col
+
+    def add(self, keys, labels):
+        cols = [self._col(label) for label in set(labels)]
+        for key in keys:
+            row = self._row(key)
+            self.totals[row] += 1
+            if cols:
+                self.counts[row, cols] += 1
+
+    def top_k(self, keys, k, min_orders, min_support):
+        # Most specific context with enough orders wins; the last one is used if it has any
+        for i, key in enumerate(keys):
+            row = self.rows.get(key)
+            if row is None:
+                continue
+            total = int(self.totals[row])
+            if total == 0 or (total < min_orders and i < len(keys) - 1):
+                continue
+
+            support = self.counts[row, :len(self.label_names)] / total
+            candidates = np.flatnonzero(support >= min_support)
+            if len(candidates) > k:
+                candidates = candidates[np.argpartition(-support[candidates], k - 1)[:k]]
+            candidates = candidates[np.argsort(-support[candidates], kind="stable")]
+            return [self.label_names[c] for c in candidates]
+        return []
+
+
+class CooccurrenceRecommender:
+    """
+    Topping/add-on recommender built on co-occurrence counts.
+
+    Every order increments counts for (dish, season, festival), (dish, season)
+    and (dish,), so new orders are reflected immediately without retraining.
+    Queries back off to the broader context when the specific one has fewer
+    than `min_orders` orders, and return labels bought in at least
+    `min_support` of those orders (at most `k`).
+    """
+
+    def __init__(self, k=5, min_orders=5, min_support=0.3):
+        self.k = k
+        self.min_orders = min_orders
+        self.min_support = min_support
+        self.toppings = _CountTable()
+        self.addons = _CountTable()
+        self.orders = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _keys(dish, season, festival):
+        return [(dish, season, festival), (dish, season), (dish,)]
+
+    def add_order(self, dish, season, festival, toppings, addons):
+        keys = self._keys(dish, season, festival)
+        with self._lock:
+            self.toppings.add(keys, toppings or [])
+            self.addons.add(keys, addons or [])
+            self.orders += 1
+
+    def fit(self, orders_df, dish_key=None):
+        """Count every row of a model_store.load_orders() frame; `dish_key` normalizes names."""
+        dish_key = dish_key or (lambda name: name)
+        for dish, season, festival, toppings, addons in zip(
+            orders_df["dish_name"], orders_df["season"], orders_df["festival"],
+            orders_df["toppings_list"], orders_df["addons_list"]
+        ):
+            self.add_order(dish_key(dish), season, festival, toppings, addons)
+        return self
+
+    def recommend(self, dish, season, festival="None", k=None):
+        """Return (toppings, addons) for the context."""
+        keys = self._keys(dish, season, festival)
+        k = k or self.k
+        with self._lock:
+            toppings = self.toppings.top_k(keys, k, self.min_orders, self.min_support)
+            addons = self.addons.top_k(keys, k, self.min_orders, self.min_support)
+        return toppings, addons
@@ -0,0 +1,204 @@
+# models/model_store.py
+
+import os
+import sys
+import ast
+import time
+import hashlib
+import argparse
+import warnings
+
+import joblib
+import pandas as pd
+import sklearn
+
+from sklearn.preprocessing import OneHotEncoder, MultiLabelBinarizer
+from sklearn.multioutput import MultiOutputClassifier
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+
+
+# =====================================================
+# 1️⃣ PATH CONFIG
+# =====================================================
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+ORDERS_CSV = os.path.join(BASE_DIR, "data", "order.csv")
+ARTIFACTS_DIR = os.path.join(BASE_DIR, "models", "artifacts")
+ARTIFACTS_FILE = os.path.join(ARTIFACTS_DIR, "suggestion_models.joblib")
+
+# Bump when the bundle layout or training recipe changes so old files retrain
+ARTIFACT_VERSION = 3
+
+FEATURE_COLUMNS = ["dish_name", "season", "festival"]
+SEASONS = ["Summer", "Monsoon", "Winter"]
+
+# Stand-ins for any dish / festival the encoder never saw (they one-hot encode to all zeros)
+UNSEEN_DISH = "__unseen_dish__"
+UNSEEN_FESTIVAL = "__unseen__"
+
+
+# =====================================================
+# 2️⃣ HELPERS
+# =====================================================
+def month_to_season(month: int) -> str:
+    if month in [3, 4, 5, 6]:
+        return "Summer"
+    elif month in [7, 8, 9, 10]:
+        return "Monsoon"
+    return "Winter"
+
+
+def fingerprint_file(path: str) -> str:
+    """
+    SHA-256 of the file contents plus the artifact version and the scikit-learn
+    and joblib versions, so a library upgrade retrains instead of unpickling
+    models built by another release.
+    """
+    digest = hashlib.sha256(f"v{ARTIFACT_VERSION}:sklearn-{sklearn.__version__}:joblib-{joblib.__version__}:".encode())
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_orders(orders_csv: str = ORDERS_CSV) -> pd.DataFrame:
+    orders_df = pd.read_csv(orders_csv)
+    orders_df["order_date"] = pd.to_datetime(orders_df["order_date"])
+    orders_df["season"] = orders_df["order_date"].dt.month.apply(month_to_season)
+    orders_df["festival"] = "None"
+
+    orders_df["toppings_list"] = orders_df["toppings_selected"].apply(
+        lambda x: ast.literal_eval(x) if isinstance(x, str) else []
+    )
+    orders_df["addons_list"] = orders_df["addons_selected"].apply(
+        lambda x: ast.literal_eval(x) if isinstance(x, str) else []
+    )
+    return orders_df
+
+
+# =====================================================
+# 3️⃣ TRAINING
+# =====================================================
+def train_models(orders_df: pd.DataFrame) -> dict:
+    X = orders_df[FEATURE_COLUMNS]
+
+    encoder = OneHotEncoder(sparse_output=False, handle_unknown="ignore")
+    X_encoded = encoder.fit_transform(X)
+
+    mlb_toppings = MultiLabelBinarizer()
+    mlb_addons = MultiLabelBinarizer()
+
+    y_toppings = mlb_toppings.fit_transform(orders_df["toppings_list"])
+    y_addons = mlb_addons.fit_transform(orders_df["addons_list"])
+
+    X_train, _, y_train_t, _ = train_test_split(X_encoded, y_toppings, test_size=0.2)
+    _, _, y_train_a, _ = train_test_split(X_encoded, y_addons, test_size=0.2)
+
+    topping_model = MultiOutputClassifier(RandomForestClassifier()).fit(X_train, y_train_t)
+    addon_model = MultiOutputClassifier(RandomForestClassifier()).fit(X_train, y_train_a)
+
+    return {
+        "encoder": encoder,
+        "mlb_toppings": mlb_toppings,
+        "mlb_addons": mlb_addons,
+        "topping_model": topping_model,
+        "addon_model": addon_model,
+    }
+
+
+def build_suggestion_table(artifacts: dict) -> dict:
+    """
+    Decode predictions for every known dish × season × festival once.
+    Returns {(dish_name, season, festival): (toppings, addons)}; dishes and
+    festivals the encoder never saw share the UNSEEN_DISH / UNSEEN_FESTIVAL keys.
+    """
+    encoder = artifacts["encoder"]
+    dishes = encoder.categories_[0].tolist() + [UNSEEN_DISH]
+    festivals = encoder.categories_[2].tolist() + [UNSEEN_FESTIVAL]
+
+    rows = [(d, s, f) for d in dishes for s in SEASONS for f in festivals]
+    if not rows:
+        return {}
+
+    with warnings.catch_warnings():
+        # UNSEEN_DISH and UNSEEN_FESTIVAL are unknown to the encoder on purpose
+        warnings.simplefilter("ignore", UserWarning)
+        X_all = encoder.transform(pd.DataFrame(rows, columns=FEATURE_COLUMNS))
+
+    toppings = artifacts["mlb_toppings"].inverse_transform(artifacts["topping_model"].predict(X_all))
+    addons = artifacts["mlb_addons"].inverse_transform(artifacts["addon_model"].predict(X_all))
+
+    return {row: (list(t), list(a)) for row, t, a in zip(rows, toppings, addons)}
+
+
+# =====================================================
+# 4️⃣ ARTIFACT STORE
+# =====================================================
+def save_artifacts(artifacts: dict, fingerprint: str, path: str = ARTIFACTS_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    bundle = {"version": ARTIFACT_VERSION, "fingerprint": fingerprint, **artifacts}
+
+    # Write to a temp file first so a concurrent loader never sees a partial bundle
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(bundle, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def load_artifacts(fingerprint: str, path: str = ARTIFACTS_FILE):
+    """Return the stored artifacts if they were trained on the same data, else None."""
+    if not os.path.exists(path):
+        return None
+    try:
+        bundle = joblib.load(path)
+    except Exception as e:
+        print(f"⚠️ Could not read model artifacts ({e}), retraining")
+        return None
+
+    if bundle.get("version") != ARTIFACT_VERSION or bundle.get("fingerprint") != fingerprint:
+        return None
+
+    bundle.pop("version", None)
+    bundle.pop("fingerprint", None)
+    return bundle
+
+
+def load_or_train(orders_csv: str = ORDERS_CSV, path: str = ARTIFACTS_FILE, force: bool = False) -> dict:
+    fingerprint = fingerprint_file(orders_csv)
+
+    if not force:
+        start = time.perf_counter()
+        artifacts = load_artifacts(fingerprint, path)
+        if artifacts is not None:
+            print(f"✅ Loaded suggestion models in {(time.perf_counter() - start) * 1000:.0f} ms")
+            return artifacts
+
+    start = time.perf_counter()
+    artifacts = train_models(load_orders(orders_csv))
+    artifacts["suggestion_table"] = build_suggestion_table(artifacts)
+    print(f"🧠 Trained suggestion models in {time.perf_counter() - start:.1f} s")
+
+    try:
+        save_artifacts(artifacts, fingerprint, path)
+    except Exception as e:
+        print(f"⚠️ Could not save model artifacts: {e}")
+
+    return artifacts
+
+
+# =====================================================
+# 5️⃣ CLI
+# =====================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the topping/add-on suggestion model artifacts.")
+    parser.add_argument("--orders", default=ORDERS_CSV, help="Path to the orders CSV")
+    parser.add_argument("--output", default=ARTIFACTS_FILE, help="Where to write the artifact bundle")
+    parser.add_argument("--force", action="store_true", help="Retrain even if the stored fingerprint matches")
+    args = parser.parse_args(argv)
+
+    load_or_train(args.orders, args.output, force=args.force)
+    print(f"📦 Artifacts ready at {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,148 +6,239 @@ load_dotenv()  # ✅ load .env ONCE
 import os
 import json
 import re
-import ast
+import time
+import threading
 import pandas as pd
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
+from models.model_store import load_or_train, load_orders, month_to_season, FEATURE_COLUMNS, UNSEEN_DISH, UNSEEN_FESTIVAL
+from models.cooccurrence import CooccurrenceRecommender
+from services import calendar_service
+from services.cache import TTLCache
+from services.singleflight import SingleFlight
+from services.deadline import remaining as budget_remaining, expired as budget_expired, \
+    submit as submit_with_budget, DeadlineExceededError
+from services.reloading_index import ReloadingFileIndex
 
-from sklearn.preprocessing import OneHotEncoder, MultiLabelBinarizer
-from sklearn.multioutput import MultiOutputClassifier
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage, SystemMessage
 
+from services.llm_router import router, AllModelsFailedError, LLMOverloadedError, hedging_from_env
+from services.llm_limiter import STANDARD
+from services.llm_clients import requires_api_key
+
 
 # =====================================================
 # 1️⃣ ENV VALIDATION (STRICT)
 # =====================================================
 GEMINI_KEY = os.getenv("GEMINI_API_KEY")
 
-if not GEMINI_KEY:
+if not GEMINI_KEY and requires_api_key():
     raise RuntimeError("❌ GEMINI_API_KEY missing in .env")
 
 # 🔐 Bind ONCE (no override later)
-os.environ["GOOGLE_API_KEY"] = GEMINI_KEY
+if GEMINI_KEY:
+    os.environ["GOOGLE_API_KEY"] = GEMINI_KEY
 
 
 # =====================================================
 # 2️⃣ PATH CONFIG
 # =====================================================
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-SERVICE_ACCOUNT_FILE = os.path.join(BASE_DIR, "data", "calender.json")
 ORDERS_CSV = os.path.join(BASE_DIR, "data", "order.csv")
 MENU_CSV = os.path.join(BASE_DIR, "data", "menu.csv")
 
 
 # =====================================================
-# 3️⃣ SEASON HELPER
+# 3️⃣ GOOGLE CALENDAR (OPTIONAL & SAFE)
 # =====================================================
-def month_to_season(month: int) -> str:
-    if month in [3, 4, 5, 6]:
-        return "Summer"
-    elif month in [7, 8, 9, 10]:
-        return "Monsoon"
-    return "Winter"
+# Shared with the tourism pipeline: one cached, snapshotted index per process
+festival_index = calendar_service.calendar_index
 
 
 # =====================================================
-# 4️⃣ GOOGLE CALENDAR (OPTIONAL & SAFE)
+# 4️⃣ MENU INDEX (normalized dish name -> details, reloaded when menu.csv changes)
 # =====================================================
-def fetch_festivals():
-    if not os.path.exists(SERVICE_ACCOUNT_FILE):
-        return pd.DataFrame(columns=["date", "festival"])
+def normalize_dish_name(name) -> str:
+    return " ".join(str(name).lower().split())
 
-    try:
-        credentials = service_account.Credentials.from_service_account_file(
-            SERVICE_ACCOUNT_FILE,
-            scopes=["https://www.googleapis.com/auth/calendar.readonly"]
-        )
-        service = build("calendar", "v3", credentials=credentials)
 
-        events = service.events().list(
-            calendarId="en.indian#holiday@group.v.calendar.google.com",
-            singleEvents=True,
-            orderBy="startTime"
-        ).execute().get("items", [])
+def build_menu_index(path) -> dict:
+    # menu.csv columns: dish_id, dish_name, category, base_price, available_toppings, available_addons
+    df = pd.read_csv(path)
+    df.columns = [c.strip() for c in df.columns]
 
-        rows = []
-        for e in events:
-            d = e["start"].get("date")
-            if d:
-                rows.append({"date": d, "festival": e.get("summary", "")})
+    index = {}
+    for row in df.to_dict(orient="records"):
+        if pd.isna(row.get("dish_name")):
+            continue
 
-        df = pd.DataFrame(rows)
-        if not df.empty:
-            df["date"] = pd.to_datetime(df["date"])
-        return df
+        details_parts = []
+        category = row.get("category", "")
+        base_price = row.get("base_price", "")
+        if category and pd.notna(category):
+            details_parts.append(f"category: {category}")
+        if base_price and pd.notna(base_price):
+            details_parts.append(f"base price: {base_price}")
 
-    except Exception:
-        return pd.DataFrame(columns=["date", "festival"])
+        # First row wins, matching the old "first match" DataFrame lookup
+        index.setdefault(normalize_dish_name(row["dish_name"]), ", ".join(details_parts))
+    return index
+
+
+menu_index = ReloadingFileIndex(MENU_CSV, build_menu_index, default={})
 
 
 # =====================================================
-# 5️⃣ LOAD DATA
+# 5️⃣ ML MODELS (loaded from the artifact store, retrained only when order.csv changes)
 # =====================================================
-orders_df = pd.read_csv(ORDERS_CSV)
-orders_df["order_date"] = pd.to_datetime(orders_df["order_date"])
-orders_df["season"] = orders_df["order_date"].dt.month.apply(month_to_season)
-orders_df["festival"] = "None"
+_artifacts = load_or_train(ORDERS_CSV)
 
-orders_df["toppings_list"] = orders_df["toppings_selected"].apply(
-    lambda x: ast.literal_eval(x) if isinstance(x, str) else []
-)
-orders_df["addons_list"] = orders_df["addons_selected"].apply(
-    lambda x: ast.literal_eval(x) if isinstance(x, str) else []
-)
+encoder = _artifacts["encoder"]
+mlb_toppings = _artifacts["mlb_toppings"]
+mlb_addons = _artifacts["mlb_addons"]
+topping_model = _artifacts["topping_model"]
+addon_model = _artifacts["addon_model"]
 
-try:
-    menu_df = pd.read_csv(MENU_CSV)
-except Exception:
-    menu_df = pd.DataFrame()
+# Every dish × season × festival the encoder knows, already decoded
+suggestion_table = _artifacts["suggestion_table"]
+KNOWN_DISHES = set(encoder.categories_[0].tolist())
+KNOWN_FESTIVALS = set(encoder.categories_[2].tolist())
 
 
 # =====================================================
-# 6️⃣ TRAIN ML MODELS
+# 6️⃣ CO-OCCURRENCE ENGINE (incremental alternative to the random forests)
 # =====================================================
-X = orders_df[["dish_name", "season", "festival"]]
+# "rf" = topping_model/addon_model, "cooccurrence" = live count-based recommender
+SUGGEST_ENGINE = os.getenv("SUGGEST_ENGINE", "rf")
+ENGINES = ("rf", "cooccurrence")
+
+_cooccurrence = None
+_cooccurrence_lock = threading.Lock()
+
+
+def get_cooccurrence_recommender():
+    """Built from order.csv on first use, then kept current by record_order()."""
+    global _cooccurrence
+    if _cooccurrence is None:
+        with _cooccurrence_lock:
+            if _cooccurrence is None:
+                recommender = CooccurrenceRecommender()
+                try:
+                    recommender.fit(load_orders(ORDERS_CSV), dish_key=normalize_dish_name)
+                except Exception as e:
+                    print(f"⚠️ Could not seed co-occurrence counts: {e}")
+                _cooccurrence = recommender
+    return _cooccurrence
+
+
+def record_order(order_date, dish_name, toppings, addons):
+    """Feed a new sale into the co-occurrence engine; no retraining needed."""
+    order_dt = pd.to_datetime(order_date)
+    season = month_to_season(order_dt.month)
+    festival = _lookup_festival(order_dt)
+    get_cooccurrence_recommender().add_order(
+        normalize_dish_name(dish_name), season, festival, toppings, addons
+    )
+    return {"dish_name": dish_name, "season": season, "festival": festival}
+
+
+def predict_items_batch(rows, engine=None):
+    """
+    (toppings, addons) for each (dish_name, season, festival) row.
+    Table hits are free; all misses share one encoder.transform and one predict per model.
+    """
+    if (engine or SUGGEST_ENGINE) == "cooccurrence":
+        recommender = get_cooccurrence_recommender()
+        return [
+            recommender.recommend(normalize_dish_name(dish_name), season, festival)
+            for dish_name, season, festival in rows
+        ]
+
+    results = [None] * len(rows)
+    misses = []
+    for i, (dish_name, season, festival) in enumerate(rows):
+        dish_key = dish_name if dish_name in KNOWN_DISHES else UNSEEN_DISH
+        festival_key = festival if festival in KNOWN_FESTIVALS else UNSEEN_FESTIVAL
+        hit = suggestion_table.get((dish_key, season, festival_key))
+        if hit is not None:
+            results[i] = (list(hit[0]), list(hit[1]))
+        else:
+            misses.append(i)
+
+    if misses:
+        X_input = encoder.transform(
+            pd.DataFrame([rows[i] for i in misses], columns=FEATURE_COLUMNS)
+        )
+        toppings = mlb_toppings.inverse_transform(topping_model.predict(X_input))
+        addons = mlb_addons.inverse_transform(addon_model.predict(X_input))
+        for i, t, a in zip(misses, toppings, addons):
+            results[i] = (list(t), list(a))
 
-encoder = OneHotEncoder(sparse_output=False, handle_unknown="ignore")
-X_encoded = encoder.fit_transform(X)
+    return results
 
-mlb_toppings = MultiLabelBinarizer()
-mlb_addons = MultiLabelBinarizer()
 
-y_toppings = mlb_toppings.fit_transform(orders_df["toppings_list"])
-y_addons = mlb_addons.fit_transform(orders_df["addons_list"])
+def predict_items(dish_name, season, festival="None", engine=None):
+    """Return (toppings, addons) from the precomputed table, predicting only unseen combinations."""
+    return predict_items_batch([(dish_name, season, festival)], engine)[0]
 
-X_train, _, y_train_t, _ = train_test_split(X_encoded, y_toppings, test_size=0.2)
-_, _, y_train_a, _ = train_test_split(X_encoded, y_addons, test_size=0.2)
 
-topping_model = MultiOutputClassifier(RandomForestClassifier()).fit(X_train, y_train_t)
-addon_model = MultiOutputClassifier(RandomForestClassifier()).fit(X_train, y_train_a)
+# =====================================================
+# 7️⃣ GEMINI MODELS (tried healthiest-first by the shared router)
+# =====================================================
+ADVISORY_MODELS = ["gemini-2.5-flash", "gemini-2.0-flash-exp", "gemini-1.5-flash", "gemini-1.5-flash-001", "gemini-pro"]
+ADVISORY_TIMEOUT = 30
+ADVISORY_HEDGING = hedging_from_env("ADVISORY")  # 🏁 ADVISORY_HEDGE / ADVISORY_HEDGE_DELAY_S
 
 
 # =====================================================
-# 7️⃣ GEMINI MODELS
+# 8️⃣ GEMINI TOOL (cached: answers barely change within a season)
 # =====================================================
-def get_chat_model(model_name="gemini-1.5-flash"):
+ADVISORY_CACHE_PATH = os.getenv(
+    "ADVISORY_CACHE_PATH", os.path.join(BASE_DIR, "data", "advisory_cache.sqlite3")
+)
+
+advisory_cache = TTLCache(
+    maxsize=int(os.getenv("ADVISORY_CACHE_SIZE", "2048")),
+    ttl=int(os.getenv("ADVISORY_CACHE_TTL_HOURS", "72")) * 3600,
+    path=ADVISORY_CACHE_PATH or None,  # empty string keeps the cache in memory only
+    name="advisory_cache"
+)
+
+
+# Identical advisories requested at the same moment share one Gemini call
+advisory_flight = SingleFlight("dish_advisory")
+
+FALLBACK_ADVISORY = {"toppings": ["Crispy Noodles", "Fried Onions"], "addons": ["Extra Sauce", "Pickle"]}
+
+
+def generate_dish_advisory(dish, season, festival="None", dish_details="", language="English", option="both",
+                           cancelled=None):
+    """`cancelled` (a threading.Event) skips the Gemini call when set before it starts; cached answers still return."""
+    key = json.dumps([dish, season, festival, dish_details, language, option], ensure_ascii=False)
+    cached = advisory_cache.get(key)
+    if cached is not None:
+        return cached
+    if budget_expired() or (cancelled is not None and cancelled.is_set()):
+        return dict(FALLBACK_ADVISORY)
+
     try:
-        return ChatGoogleGenerativeAI(
-            model=model_name,
-            temperature=0.4,
-            timeout=30
+        return advisory_flight.do(
+            key, _fetch_dish_advisory, key, dish, season, festival, dish_details, language, option
         )
-    except Exception:
-        return None
+    except DeadlineExceededError:
+        return dict(FALLBACK_ADVISORY)
 
-# =====================================================
-# 8️⃣ GEMINI TOOL
-# =====================================================
-def generate_dish_advisory(dish, season, festival="None", dish_details="", language="English", option="both"):
+
+def _fetch_dish_advisory(key, dish, season, festival, dish_details, language, option):
+    result, ok = _ask_dish_advisory(dish, season, festival, dish_details, language, option)
+    if ok:
+        advisory_cache.set(key, result)
+    return result
+
+
+def _ask_dish_advisory(dish, season, festival, dish_details, language, option):
+    """Returns (advisory, ok); ok is False for fallback answers that must not be cached."""
     
     context_part = ""
     if dish_details:
@@ -165,100 +256,167 @@ def generate_dish_advisory(dish, season, festival="None", dish_details="", langu
     if language.lower() == "marathi":
         prompt += " Translate everything into Marathi."
 
-    # List of models to try in order
-    models_to_try = ["gemini-2.5-flash", "gemini-2.0-flash-exp", "gemini-1.5-flash", "gemini-1.5-flash-001", "gemini-pro"]
-    
-    response_content = None
-    
-    for model_name in models_to_try:
-        try:
-            chat_model = get_chat_model(model_name)
-            if not chat_model:
-                continue
-                
-            response = chat_model.invoke([
+    try:
+        response_content = router.invoke(
+            ADVISORY_MODELS,
+            [
                 SystemMessage(content="Return ONLY JSON: {\"toppings\":[],\"addons\":[]}"),
                 HumanMessage(content=prompt)
-            ])
-            response_content = response.content
-            if response_content:
-                break
-        except Exception as e:
-            print(f"⚠️ Model {model_name} failed: {e}")
-            continue
-
-    if not response_content:
+            ],
+            temperature=0.4,
+            timeout=ADVISORY_TIMEOUT,
+            priority=STANDARD,
+            **ADVISORY_HEDGING
+        )
+    except LLMOverloadedError as e:
+        print(f"⚠️ Advisory shed: {e}")
+        return dict(FALLBACK_ADVISORY), False
+    except AllModelsFailedError:
         print("❌ All AI models failed.")
-        return {"toppings": ["Crispy Noodles", "Fried Onions"], "addons": ["Extra Sauce", "Pickle"]} # Fallback defaults
+        return dict(FALLBACK_ADVISORY), False # Fallback defaults
 
     try:
         match = re.search(r"\{.*\}", response_content, re.DOTALL)
         if match:
-             return json.loads(match.group(0))
+             return json.loads(match.group(0)), True
     except json.JSONDecodeError:
         print("❌ JSON Decode Error from AI response")
     except Exception as e:
         print(f"❌ Error parsing AI response: {e}")
 
-    return {"toppings": [], "addons": []}
+    return {"toppings": [], "addons": []}, False
 
 
 # =====================================================
 # 9️⃣ ORCHESTRATOR
 # =====================================================
-def suggest_items_orchestrator(order_date, dish_name, language="English", option="both"):
-    order_dt = pd.to_datetime(order_date)
-    season = month_to_season(order_dt.month)
-    
-    # 1. Look up Festival
-    festival = "None"
+MAX_BATCH_ITEMS = int(os.getenv("SUGGEST_MAX_BATCH_ITEMS", "200"))
+
+# LLM fallbacks for batch requests run concurrently on this pool
+_llm_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SUGGEST_LLM_WORKERS", "8")),
+    thread_name_prefix="suggest-llm"
+)
+
+# ⚡ Concurrent mode: festival + menu lookups fan out, the Gemini advisory can
+# start speculatively while ML runs, and SUGGEST_DEADLINE_SECONDS caps the wait
+# (or the request budget, if that is shorter)
+SUGGEST_MODE = os.getenv("SUGGEST_MODE", "serial")  # "serial" | "concurrent"
+SPECULATIVE_LLM = os.getenv("SUGGEST_SPECULATIVE_LLM", "False").lower() == "true"
+# Head start for the ML step: a table hit answers in microseconds and cancels the advisory before it calls Gemini
+SPECULATIVE_DELAY = float(os.getenv("SUGGEST_SPECULATIVE_DELAY_MS", "50")) / 1000
+SUGGEST_DEADLINE = float(os.getenv("SUGGEST_DEADLINE_SECONDS", "20"))
+
+_lookup_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SUGGEST_LOOKUP_WORKERS", "8")),
+    thread_name_prefix="suggest-lookup"
+)
+
+
+def _lookup_festival(order_dt):
     try:
-        festivals_df = fetch_festivals()
-        if not festivals_df.empty:
-            # Check if this date has a festival
-            mask = festivals_df["date"] == order_dt
-            if mask.any():
-                festival = festivals_df.loc[mask, "festival"].values[0]
+        return festival_index.lookup(order_dt) or "None"
     except Exception as e:
         print(f"⚠️ Festival lookup failed: {e}")
+        return "None"
 
-    # 2. Look up Dish Details from Menu
-    dish_details = ""
+
+def _lookup_dish_details(dish_name):
+    return menu_index.get().get(normalize_dish_name(dish_name), "")
+
+
+def _build_result(dish_name, order_dt, season, festival, toppings, addons):
+    return {
+        "dish_name": dish_name,
+        "date": order_dt.strftime("%Y-%m-%d"),
+        "season": season,
+        "festival": festival,
+        "toppings": toppings or ["No suggestions"],
+        "addons": addons or ["No suggestions"]
+    }
+
+
+def _result_by(future, deadline, default):
+    """future.result() bounded by a time.monotonic() deadline; `default` on timeout or error."""
     try:
-        if not menu_df.empty:
-            # menu.csv columns: dish_id, dish_name, category, base_price, available_toppings, available_addons
-            
-            # Normalize column names just in case
-            menu_df.columns = [c.strip() for c in menu_df.columns]
-            
-            # Find the row (Case-insensitive search)
-            row = menu_df[menu_df["dish_name"].str.lower() == dish_name.lower()]
-            if not row.empty:
-                category = row.iloc[0].get("category", "")
-                base_price = row.iloc[0].get("base_price", "")
-                
-                details_parts = []
-                if category:
-                    details_parts.append(f"category: {category}")
-                if base_price:
-                    details_parts.append(f"base price: {base_price}")
-                
-                dish_details = ", ".join(details_parts)
+        return future.result(timeout=max(0.0, deadline - time.monotonic()))
+    except FutureTimeoutError:
+        future.cancel()
+        return default
     except Exception as e:
-        print(f"⚠️ Menu lookup failed: {e}")
+        print(f"⚠️ Suggestion step failed: {e}")
+        return default
 
 
-    toppings, addons = [], []
+def _speculative_advisory(cancelled, *args):
+    if cancelled.wait(SPECULATIVE_DELAY):
+        return None
+    return generate_dish_advisory(*args, cancelled=cancelled)
+
+
+def _suggest_concurrent(order_dt, dish_name, language, option, engine):
+    deadline = time.monotonic() + min(SUGGEST_DEADLINE, budget_remaining())
+    season = month_to_season(order_dt.month)
 
+    # 1. Festival and menu lookups are independent
+    festival_job = submit_with_budget(_lookup_pool, _lookup_festival, order_dt)
+    details_job = submit_with_budget(_lookup_pool, _lookup_dish_details, dish_name)
+    festival = _result_by(festival_job, deadline, "None")
+
+    # 2. Optionally start the advisory before knowing whether ML will need it
+    llm_job = None
+    llm_cancelled = threading.Event()
+    if SPECULATIVE_LLM:
+        dish_details = _result_by(details_job, deadline, "")
+        llm_job = submit_with_budget(
+            _llm_pool, _speculative_advisory, llm_cancelled,
+            dish_name, season, festival, dish_details, language, option
+        )
+
+    # 3. ML prediction on this thread
+    toppings, addons = [], []
     try:
-        X_input = encoder.transform(
-            pd.DataFrame([[dish_name, season, festival]],
-            columns=["dish_name", "season", "festival"])
+        toppings, addons = predict_items(dish_name, season, festival, engine)
+    except Exception:
+        pass
+
+    if toppings and addons:
+        if llm_job is not None:
+            # Not needed: stops the advisory unless its Gemini call is already running
+            # (that answer still lands in advisory_cache)
+            llm_cancelled.set()
+            llm_job.cancel()
+        return _build_result(dish_name, order_dt, season, festival, toppings, addons)
+
+    if llm_job is None:
+        dish_details = _result_by(details_job, deadline, "")
+        llm_job = submit_with_budget(
+            _llm_pool, generate_dish_advisory, dish_name, season, festival, dish_details, language, option
         )
-        toppings = list(mlb_toppings.inverse_transform(
-            topping_model.predict(X_input))[0])
-        addons = list(mlb_addons.inverse_transform(
-            addon_model.predict(X_input))[0])
+    llm_out = _result_by(llm_job, deadline, FALLBACK_ADVISORY)
+    return _build_result(
+        dish_name, order_dt, season, festival,
+        llm_out.get("toppings", []), llm_out.get("addons", [])
+    )
+
+
+def suggest_items_orchestrator(order_date, dish_name, language="English", option="both", engine=None, mode=None):
+    order_dt = pd.to_datetime(order_date)
+    if (mode or SUGGEST_MODE) == "concurrent":
+        return _suggest_concurrent(order_dt, dish_name, language, option, engine)
+
+    season = month_to_season(order_dt.month)
+    
+    # 1. Look up Festival
+    festival = _lookup_festival(order_dt)
+
+    # 2. Look up Dish Details from Menu
+    dish_details = _lookup_dish_details(dish_name)
+
+    toppings, addons = [], []
+
+    try:
+        toppings, addons = predict_items(dish_name, season, festival, engine)
     except Exception:
         pass
 
@@ -267,11 +425,61 @@ def suggest_items_orchestrator(order_date, dish_name, language="English", option
         toppings = llm_out.get("toppings", [])
         addons = llm_out.get("addons", [])
 
-    return {
-        "dish_name": dish_name,
-        "date": order_dt.strftime("%Y-%m-%d"),
-        "season": season,
-        "festival": festival,
-        "toppings": toppings or ["No suggestions"],
-        "addons": addons or ["No suggestions"]
-    }
+    return _build_result(dish_name, order_dt, season, festival, toppings, addons)
+
+
+def suggest_items_batch(items, engine=None):
+    """
+    Suggestions for a list of {order_date, dish_name, language, option} dicts.
+    Results keep the input order; invalid items get an "error" entry instead.
+    """
+    results = [None] * len(items)
+    rows, contexts = [], []
+
+    for i, item in enumerate(items):
+        if not isinstance(item, dict) or not item.get("order_date") or not item.get("dish_name"):
+            results[i] = {"error": "Both 'order_date' and 'dish_name' are required"}
+            continue
+        try:
+            order_dt = pd.to_datetime(item["order_date"])
+        except Exception:
+            results[i] = {"error": f"Invalid order_date: {item['order_date']}"}
+            continue
+
+        dish_name = item["dish_name"]
+        season = month_to_season(order_dt.month)
+        festival = _lookup_festival(order_dt)
+        rows.append((dish_name, season, festival))
+        contexts.append((i, item, order_dt))
+
+    try:
+        predictions = predict_items_batch(rows, engine)
+    except Exception as e:
+        print(f"⚠️ Batch prediction failed: {e}")
+        predictions = [([], [])] * len(rows)
+
+    llm_jobs = {}
+    for (i, item, order_dt), (dish_name, season, festival), (toppings, addons) in zip(contexts, rows, predictions):
+        if toppings and addons:
+            results[i] = _build_result(dish_name, order_dt, season, festival, toppings, addons)
+            continue
+        llm_jobs[i] = submit_with_budget(
+            _llm_pool, generate_dish_advisory,
+            dish_name, season, festival, _lookup_dish_details(dish_name),
+            item.get("language", "English"), item.get("option", "both")
+        )
+
+    for (i, item, order_dt), (dish_name, season, festival) in zip(contexts, rows):
+        if i not in llm_jobs:
+            continue
+        try:
+            llm_out = llm_jobs[i].result()
+        except Exception as e:
+            print(f"⚠️ Batch LLM fallback failed for {dish_name}: {e}")
+            llm_out = {}
+        results[i] = _build_result(
+            dish_name, order_dt, season, festival,
+            llm_out.get("toppings", []), llm_out.get("addons", [])
+        )
+
+    return results
@@ -1,10 +1,19 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from dotenv import load_dotenv
 import os
 import re
+import json
 
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import SystemMessage, HumanMessage
+from services.lazy_loader import lazy_import
+from services.llm_router import router, AllModelsFailedError, LLMOverloadedError, hedging_from_env
+from services.llm_limiter import INTERACTIVE
+from services.deadline import with_budget, budget_from_env
+from services.question_cache import QuestionCache
+from memory.memory_handler import memory
+from services.llm_clients import requires_api_key
+
+# 💤 langchain is imported on the first chat request (or by the warm-up)
+messages = lazy_import("langchain_core.messages")
 
 load_dotenv()
 
@@ -16,33 +25,100 @@ chat_routes = Blueprint("chat_routes", __name__)
 if os.environ.get("GEMINI_API_KEY") and not os.environ.get("GOOGLE_API_KEY"):
     os.environ["GOOGLE_API_KEY"] = os.environ["GEMINI_API_KEY"]
 
-if not os.environ.get("GOOGLE_API_KEY"):
+if requires_api_key() and not os.environ.get("GOOGLE_API_KEY"):
     raise RuntimeError("❌ GOOGLE_API_KEY not found")
 
 # --------------------------------------------------
-# 🤖 Gemini Model
+# 🤖 Gemini Models (tried healthiest-first by the shared router)
 # --------------------------------------------------
+CHAT_MODELS = ["gemini-2.5-flash", "gemini-2.0-flash-exp", "gemini-1.5-flash", "gemini-1.5-flash-001", "gemini-pro"]
+CHAT_TIMEOUT = 10  # ⚡ Fail fast (10s) to try next model
+CHAT_HEDGING = hedging_from_env("CHAT")  # 🏁 CHAT_HEDGE / CHAT_HEDGE_DELAY_S (non-streaming only)
+CHAT_BUDGET = budget_from_env("CHAT_BUDGET_S", 15)  # ⏱️ whole fallback chain; streams: until the first token
+
+CHAT_SUGGESTIONS = ["Increase Sales", "Fix Menu Prices", "Best Location", "License Help"]
+
 # --------------------------------------------------
-# 🤖 Gemini Model Helpers
+# 🗂️ FAQ cache (near-identical questions reuse one answer)
 # --------------------------------------------------
-def get_chat_model(model_name="gemini-1.5-flash"):
-    try:
-        return ChatGoogleGenerativeAI(
-            model=model_name,
-            temperature=0.5,
-            timeout=10  # ⚡ Fail fast (10s) to try next model
-        )
-    except Exception:
-        return None
+question_cache = QuestionCache(
+    maxsize=int(os.environ.get("CHAT_CACHE_SIZE", "500")),
+    ttl=int(os.environ.get("CHAT_CACHE_TTL_HOURS", "24")) * 3600,
+    threshold=int(os.environ.get("CHAT_CACHE_SIMILARITY", "92"))
+)
 
 def clean_text(text: str) -> str:
     text = re.sub(r"[*#>-]+", "", text)
     return text.strip()
 
+class IncrementalCleaner:
+    """
+    clean_text() applied chunk by chunk: concatenating the feed() outputs gives
+    the same string as clean_text() on the whole reply. Trailing whitespace is
+    held back until more text arrives so the final .strip() still holds.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.pending = ""
+
+    def feed(self, chunk: str) -> str:
+        text = re.sub(r"[*#>-]+", "", chunk)
+        if not self.started:
+            text = text.lstrip()
+            if not text:
+                return ""
+            self.started = True
+        text = self.pending + text
+        stripped = text.rstrip()
+        self.pending = text[len(stripped):]
+        return stripped
+
+def build_chat_messages(user_message: str, history=()):
+    system_msg = messages.SystemMessage(
+        content=(
+            "You are Startup Mitra, an expert Indian food business consultant. "
+            "Provide helpful, detailed, and practical advice. "
+            "Explain concepts clearly in simple language. "
+            "Use bullet points if needed for clarity. "
+            "Focus on actionable steps for a small business owner."
+        )
+    )
+    return [system_msg, *history, messages.HumanMessage(content=user_message)]
+
+MAX_SESSION_ID_LENGTH = 128
+
+def valid_session_id(session_id) -> bool:
+    """None (no memory) or a short non-empty string."""
+    return session_id is None or (isinstance(session_id, str) and 0 < len(session_id) <= MAX_SESSION_ID_LENGTH)
+
+def invalid_session_response():
+    return jsonify({"error": f"'session_id' must be a non-empty string of at most {MAX_SESSION_ID_LENGTH} characters"}), 400
+
+def remember_turn(session_id, user_message: str, reply: str):
+    if session_id:
+        memory.add_message(session_id, "user", user_message)
+        memory.add_message(session_id, "bot", reply)
+
+def sse_event(payload: dict, event: str = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+def overloaded_response():
+    # Shed by the shared LLM admission controller; clients should retry shortly
+    response = jsonify({
+        "status": "overloaded",
+        "text": "I’m getting a lot of questions right now. Please try again in a moment.",
+        "suggestions": ["Try Again"]
+    })
+    response.headers["Retry-After"] = "2"
+    return response, 503
+
 # --------------------------------------------------
 # 📡 CHAT ENDPOINT
 # --------------------------------------------------
 @chat_routes.route("/chat", methods=["POST"])
+@with_budget(CHAT_BUDGET)
 def chat():
     try:
         data = request.get_json()
@@ -54,51 +130,44 @@ def chat():
                 "suggestions": ["Start Business", "License Help"]
             })
 
-        system_msg = SystemMessage(
-            content=(
-                "You are Startup Mitra, an expert Indian food business consultant. "
-                "Provide helpful, detailed, and practical advice. "
-                "Explain concepts clearly in simple language. "
-                "Use bullet points if needed for clarity. "
-                "Focus on actionable steps for a small business owner."
-            )
-        )
+        # Optional per-session memory; follow-up questions skip the FAQ cache
+        session_id = data.get("session_id")
+        if not valid_session_id(session_id):
+            return invalid_session_response()
+        history = memory.get_messages(session_id) if session_id else []
 
-        user_msg = HumanMessage(content=user_message)
+        cached_reply = question_cache.get(user_message) if not history else None
+        if cached_reply is not None:
+            remember_turn(session_id, user_message, cached_reply)
+            return jsonify({
+                "text": cached_reply,
+                "suggestions": CHAT_SUGGESTIONS
+            })
 
         # ✅ ROBUST MODEL INVOCATION
-        models_to_try = ["gemini-2.5-flash", "gemini-2.0-flash-exp", "gemini-1.5-flash", "gemini-1.5-flash-001", "gemini-pro"]
-        response_content = None
-
-        for model_name in models_to_try:
-            try:
-                model = get_chat_model(model_name)
-                if not model:
-                    continue
-                response = model.invoke([system_msg, user_msg])
-                if response and response.content:
-                    response_content = response.content
-                    break
-            except Exception as e:
-                print(f"⚠️ Chat Request failed with {model_name}: {e}")
-                continue
-        
-        if not response_content:
-             return jsonify({
+        try:
+            response_content = router.invoke(
+                CHAT_MODELS, build_chat_messages(user_message, history), temperature=0.5, timeout=CHAT_TIMEOUT,
+                priority=INTERACTIVE, **CHAT_HEDGING
+            )
+        except LLMOverloadedError as e:
+            print(f"⚠️ Chat request shed: {e}")
+            return overloaded_response()
+        except AllModelsFailedError as e:
+            print(f"⚠️ Chat Request failed on all models: {e}")
+            return jsonify({
                 "text": "Sorry, I’m having trouble thinking right now. Please try again.",
                 "suggestions": ["Try Again"]
             }), 500
 
         reply = clean_text(response_content)
+        if reply and not history:
+            question_cache.set(user_message, reply)
+        remember_turn(session_id, user_message, reply)
 
         return jsonify({
             "text": reply,
-            "suggestions": [
-                "Increase Sales",
-                "Fix Menu Prices",
-                "Best Location",
-                "License Help"
-            ]
+            "suggestions": CHAT_SUGGESTIONS
         })
 
     except Exception as e:
@@ -107,3 +176,92 @@ def chat():
             "text": "Sorry, I’m having trouble right now. Please try again.",
             "suggestions": ["Try Again"]
         }), 500
+
+# --------------------------------------------------
+# 📡 STREAMING CHAT ENDPOINT (Server-Sent Events)
+# --------------------------------------------------
+# Events: "data: {"text": ...}" per cleaned chunk, then "event: done" with the
+# suggestions, or "event: error" if the model fails mid-answer.
+@chat_routes.route("/chat/stream", methods=["POST"])
+@with_budget(CHAT_BUDGET)
+def chat_stream():
+    try:
+        data = request.get_json()
+        user_message = data.get("message", "").strip()
+
+        if not user_message:
+            return jsonify({
+                "text": "Please ask something 🙂",
+                "suggestions": ["Start Business", "License Help"]
+            })
+
+        session_id = data.get("session_id")
+        if not valid_session_id(session_id):
+            return invalid_session_response()
+        history = memory.get_messages(session_id) if session_id else []
+
+        cached_reply = question_cache.get(user_message) if not history else None
+        if cached_reply is not None:
+            remember_turn(session_id, user_message, cached_reply)
+            cached_events = [sse_event({"text": cached_reply}), sse_event({"suggestions": CHAT_SUGGESTIONS}, event="done")]
+            return Response(cached_events, mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+        # Model fallback happens here, before the first byte is sent
+        try:
+            chunks = router.stream(
+                CHAT_MODELS, build_chat_messages(user_message, history), temperature=0.5, timeout=CHAT_TIMEOUT,
+                priority=INTERACTIVE
+            )
+        except LLMOverloadedError as e:
+            print(f"⚠️ Chat stream shed: {e}")
+            return overloaded_response()
+        except AllModelsFailedError as e:
+            print(f"⚠️ Chat stream failed on all models: {e}")
+            return jsonify({
+                "text": "Sorry, I’m having trouble thinking right now. Please try again.",
+                "suggestions": ["Try Again"]
+            }), 500
+
+        def generate():
+            cleaner = IncrementalCleaner()
+            reply_parts = []
+            try:
+                for chunk in chunks:
+                    text = cleaner.feed(chunk)
+                    if text:
+                        reply_parts.append(text)
+                        yield sse_event({"text": text})
+            except Exception as e:
+                print("❌ Gemini stream error:", e)
+                yield sse_event({"text": "Sorry, the answer was interrupted. Please try again.",
+                                 "suggestions": ["Try Again"]}, event="error")
+                return
+            if reply_parts:
+                reply = "".join(reply_parts)
+                if not history:
+                    question_cache.set(user_message, reply)
+                remember_turn(session_id, user_message, reply)
+            yield sse_event({"suggestions": CHAT_SUGGESTIONS}, event="done")
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    except Exception as e:
+        print("❌ Gemini Error:", e)
+        return jsonify({
+            "text": "Sorry, I’m having trouble right now. Please try again.",
+            "suggestions": ["Try Again"]
+        }), 500
+
+# --------------------------------------------------
+# 🧹 CLEAR SESSION MEMORY
+# --------------------------------------------------
+@chat_routes.route("/chat/session/<session_id>", methods=["DELETE"])
+def clear_chat_session(session_id):
+    if not valid_session_id(session_id):
+        return invalid_session_response()
+    memory.clear(session_id)
+    return jsonify({"message": "Session cleared"})
@@ -1,14 +1,17 @@
 # review_routes.py
 from flask import Blueprint, jsonify
-from sheet_analyzer import fetch_all_google_sheet_data
+from services.lazy_loader import lazy_import
 from collections import Counter
 
 review_routes = Blueprint("review_routes", __name__)
 
+# 💤 TextBlob + googleapiclient load on first use
+sheet_analyzer = lazy_import("sheet_analyzer")
+
 @review_routes.route("/reviews", methods=["GET"])
 def get_reviews():
     try:
-        data = fetch_all_google_sheet_data()
+        data = sheet_analyzer.fetch_all_google_sheet_data()
 
         # Debug: print number of records fetched
         print(f"[DEBUG] Number of reviews fetched: {len(data)}")
@@ -1,13 +1,20 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response
+import json
 from datetime import datetime
-from services.data_service import get_top_places
-from services.calendar_service import get_calendar_events, generate_calendar_flags
-from services.weather_service import get_weather
-from services.ai_service import generate_vendor_insights
+from services.lazy_loader import lazy_import
+from services.deadline import with_budget, budget, budget_from_env, DeadlineExceededError
 
 tourism_routes = Blueprint("tourism_routes", __name__)
 
+# 💤 pandas/places CSV, googleapiclient and langchain load on the first tourism request
+calendar_service = lazy_import("services.calendar_service")
+tourism_service = lazy_import("services.tourism_service")
+
+TOURISM_BUDGET = budget_from_env("TOURISM_BUDGET_S", 25)
+TOURISM_BATCH_BUDGET = budget_from_env("TOURISM_BATCH_BUDGET_S", 60)
+
 @tourism_routes.route("/tourism", methods=["POST"])
+@with_budget(TOURISM_BUDGET)
 def tourism_api():
     data = request.get_json()
 
@@ -19,48 +26,104 @@ def tourism_api():
         return jsonify({"error": "city, state, and date are required"}), 400
 
     try:
-        try:
-            check_date = datetime.strptime(date_input, "%Y-%m-%d")
-        except ValueError:
-            check_date = datetime.strptime(date_input, "%d-%m-%Y")
+        check_date = parse_date(date_input)
     except ValueError:
         return jsonify({"error": "Invalid date format"}), 400
 
-    event_dates = get_calendar_events(
-        datetime(check_date.year, 1, 1),
-        datetime(check_date.year, 12, 31)
-    )
+    # Cached per (city, state, date); on a miss calendar, weather and places run
+    # concurrently and slow ones come back in Partial_Sources
+    try:
+        insights, timings, cache_hit = tourism_service.get_tourism_insights(city, state, check_date)
+    except DeadlineExceededError:
+        # Budget spent waiting on another request's build of the same insights
+        response = jsonify({"error": "Tourism insights are still being prepared. Please retry shortly."})
+        response.headers["Retry-After"] = "2"
+        return response, 503
+    if insights is None:
+        response = jsonify({"error": "No tourist data found"})
+        response.headers["Server-Timing"] = timings.header()
+        return response, 404
+
+    response = jsonify(insights)
+    response.headers["Server-Timing"] = timings.header(insights["Partial_Sources"])
+    response.headers["X-Cache"] = "HIT" if cache_hit else "MISS"
+    return response
 
-    calendar_flags = generate_calendar_flags(check_date, event_dates)
-    weather_info = get_weather(city, check_date.strftime("%Y-%m-%d"))
-    top_places = get_top_places(city, state)
+# 📦 Batch planning: one NDJSON line per item, in completion order
+@tourism_routes.route("/tourism/batch", methods=["POST"])
+def tourism_batch_api():
+    data = request.get_json(silent=True)
 
-    # Filter upcoming events (next 30 days)
-    upcoming_events = []
-    for date_str, event_name in event_dates.items():
+    # Accept either a bare list or {"items": [...]}
+    items = data.get("items") if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "'items' must be a non-empty list"}), 400
+    if len(items) > tourism_service.MAX_BATCH_ITEMS:
+        return jsonify({"error": f"At most {tourism_service.MAX_BATCH_ITEMS} items per batch"}), 400
+
+    valid, invalid = [], []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not item.get("city") or not item.get("state") or not item.get("date"):
+            invalid.append({"index": index, "status": 400, "error": "city, state, and date are required"})
+            continue
+        if not all(isinstance(item[field], str) and item[field].strip() for field in ("city", "state")):
+            invalid.append({"index": index, "status": 400, "error": "city and state must be non-empty strings"})
+            continue
         try:
-            event_date = datetime.strptime(date_str, "%Y-%m-%d")
-            delta = (event_date - check_date).days
-            if 0 <= delta <= 30:
-                upcoming_events.append({"date": date_str, "event": event_name, "days_away": delta})
+            valid.append((index, (item["city"], item["state"], parse_date(item["date"]))))
         except ValueError:
-            continue
-    
-    # Sort by date
-    upcoming_events.sort(key=lambda x: x["days_away"])
-
-    if not top_places:
-        return jsonify({"error": "No tourist data found"}), 404
-
-    insights = {
-        "City": city,
-        "State": state,
-        "Date": check_date.strftime("%Y-%m-%d"),
-        **calendar_flags,
-        **weather_info,
-        "Top_Tourist_Spots": top_places,
-        "Upcoming_Events": upcoming_events
-    }
-
-    insights["AI_Insights"] = generate_vendor_insights(insights)
-    return jsonify(insights)
+            invalid.append({"index": index, "status": 400, "error": "Invalid date format"})
+
+    def ndjson(payload):
+        return json.dumps(payload, ensure_ascii=False) + "\n"
+
+    def generate():
+        for line in invalid:
+            yield ndjson(line)
+        if not valid:
+            return
+        # The budget covers the whole stream; the view has already returned by now
+        with budget(TOURISM_BATCH_BUDGET):
+            for position, insights, error in tourism_service.iter_batch([entry for _, entry in valid]):
+                index = valid[position][0]
+                if error is not None:
+                    yield ndjson({"index": index, "status": 500, "error": "Server Error"})
+                elif insights is None:
+                    yield ndjson({"index": index, "status": 404, "error": "No tourist data found"})
+                else:
+                    yield ndjson({"index": index, "status": 200, "result": insights})
+
+    return Response(
+        generate(),
+        mimetype="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# 📅 Calendar flags for a whole date range (e.g. a month for the forecasting views)
+@tourism_routes.route("/calendar/flags", methods=["GET"])
+def calendar_flags_api():
+    start_input = request.args.get("start")
+    end_input = request.args.get("end")
+    if not start_input or not end_input:
+        return jsonify({"error": "start and end are required"}), 400
+
+    try:
+        start_date = parse_date(start_input)
+        end_date = parse_date(end_input)
+    except ValueError:
+        return jsonify({"error": "Invalid date format"}), 400
+
+    try:
+        flags = calendar_service.calendar_flags_range(start_date, end_date)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"start": start_date.strftime("%Y-%m-%d"), "end": end_date.strftime("%Y-%m-%d"), "days": flags})
+
+def parse_date(value: str) -> datetime:
+    if not isinstance(value, str):
+        # e.g. 20251010 sent as a JSON number
+        raise ValueError(f"date must be a string, not {type(value).__name__}")
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        return datetime.strptime(value, "%d-%m-%Y")
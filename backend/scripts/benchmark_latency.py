@@ -0,0 +1,147 @@
+"""
+End-to-end latency benchmark for the Flask API.
+
+Drives the app in-process through Flask's test client at a fixed concurrency
+and reports p50/p95/p99 latency, error count and throughput per route. By
+default the LLM calls go to the fake backend (services/fake_llm.py), so no
+Gemini key or network is needed:
+
+    python scripts/benchmark_latency.py --routes chat,suggest --requests 200 --concurrency 8
+    python scripts/benchmark_latency.py --latency-ms 1500 --failure-rate 0.1 --json out.json
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+CHAT_QUESTIONS = [
+    "How do I get a street food license?",
+    "What should I charge for pani puri?",
+    "Best location for a chai stall?",
+    "How can I increase weekend sales?",
+    "how do i get a street food licence",
+]
+SUGGEST_DISHES = ["Pani Puri", "Masala Dosa", "Vada Pav", "Pav Bhaji", "Samosa"]
+TOURISM_CITIES = [("Jaipur", "Rajasthan"), ("Agra", "Uttar Pradesh"), ("Mumbai", "Maharashtra")]
+
+
+def payloads(route, unique=False):
+    """
+    Endless (method, path, json) requests for a route, cycling through a few
+    inputs. With `unique`, chat and suggest inputs get a random tag so response
+    caches (including the fuzzy chat cache) miss.
+    """
+    if route == "chat":
+        for question in itertools.cycle(CHAT_QUESTIONS):
+            yield "POST", "/api/chat", {"message": f"{question} [{uuid.uuid4().hex}]" if unique else question}
+    elif route == "suggest":
+        for i, dish in enumerate(itertools.cycle(SUGGEST_DISHES)):
+            yield "POST", "/api/suggest", {
+                "order_date": f"2025-{i % 12 + 1:02d}-15",
+                "dish_name": f"{dish} {uuid.uuid4().hex[:8]}" if unique else dish
+            }
+    elif route == "tourism":
+        for city, state in itertools.cycle(TOURISM_CITIES):
+            yield "POST", "/api/tourism", {"city": city, "state": state, "date": "2025-10-20"}
+    else:
+        raise ValueError(f"Unknown route '{route}'")
+
+
+def percentile(ordered, pct):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(pct * len(ordered)))]
+
+
+def run_route(app, route, total, concurrency, unique=False):
+    requests = list(itertools.islice(payloads(route, unique), total))
+
+    def send(request):
+        method, path, body = request
+        start = time.perf_counter()
+        # One test client per call; the client itself is not meant to be shared across threads
+        response = app.test_client().open(path, method=method, json=body)
+        response.get_data()  # drain streamed bodies too
+        return time.perf_counter() - start, response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(send, requests))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for latency, _ in outcomes)
+    statuses = {}
+    for _, status in outcomes:
+        statuses[status] = statuses.get(status, 0) + 1
+
+    def ms(value):
+        return round(value * 1000, 1) if value is not None else None
+
+    return {
+        "route": route,
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": sum(count for status, count in statuses.items() if status >= 500),
+        "statuses": statuses,
+        "p50_ms": ms(percentile(latencies, 0.50)),
+        "p95_ms": ms(percentile(latencies, 0.95)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark API latency at a fixed concurrency.")
+    parser.add_argument("--routes", default="chat,suggest", help="Comma-separated: chat, suggest, tourism")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per route")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed requests per route first")
+    parser.add_argument("--unique", action="store_true", help="Distinct inputs per request (bypass caches)")
+    parser.add_argument("--backend", default="fake", choices=["fake", "gemini"])
+    parser.add_argument("--latency-ms", type=float, help="Fake backend mean latency")
+    parser.add_argument("--jitter-ms", type=float, help="Fake backend latency jitter (+/-)")
+    parser.add_argument("--failure-rate", type=float, help="Fake backend share of 503 errors")
+    parser.add_argument("--quota-rate", type=float, help="Fake backend share of quota errors")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args(argv)
+
+    # Configure before the app (and the fake backend) read their settings
+    os.environ["LLM_BACKEND"] = args.backend
+    os.environ.setdefault("WARM_UP", "False")
+    for flag, env in [("latency_ms", "FAKE_LLM_LATENCY_MS"), ("jitter_ms", "FAKE_LLM_JITTER_MS"),
+                      ("failure_rate", "FAKE_LLM_FAILURE_RATE"), ("quota_rate", "FAKE_LLM_QUOTA_RATE")]:
+        if getattr(args, flag) is not None:
+            os.environ[env] = str(getattr(args, flag))
+
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, BACKEND_DIR)
+    from app import app
+
+    results = []
+    for route in [r.strip() for r in args.routes.split(",") if r.strip()]:
+        if args.warmup:
+            run_route(app, route, args.warmup, min(args.warmup, args.concurrency), args.unique)
+        results.append(run_route(app, route, args.requests, args.concurrency, args.unique))
+
+    print(f"\n📊 Latency ({args.backend} backend, concurrency {args.concurrency})")
+    print(f"{'route':<10}{'reqs':>6}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>9}")
+    for r in results:
+        print(f"{r['route']:<10}{r['requests']:>6}{r['errors']:>8}{r['p50_ms']:>10}{r['p95_ms']:>10}"
+              f"{r['p99_ms']:>10}{r['throughput_rps']:>9}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"backend": args.backend, "results": results}, f, indent=2)
+        print(f"📝 Wrote {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
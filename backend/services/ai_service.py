@@ -1,22 +1,23 @@
 import re
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import SystemMessage, HumanMessage
-from config import GEMINI_MODEL, GOOGLE_API_KEY
+from config import GOOGLE_API_KEY
+from services.llm_router import router, AllModelsFailedError, LLMOverloadedError, hedging_from_env
+from services.llm_limiter import BACKGROUND
+from services.singleflight import SingleFlight
+from services.deadline import DeadlineExceededError
+from services.llm_clients import requires_api_key
 
 # Set API key
 os.environ["GOOGLE_API_KEY"] = GOOGLE_API_KEY
 
-# Initialize Chat Model
+# Limit models to avoid long timeouts if quota is dead
+FAST_MODELS = ["gemini-1.5-flash", "gemini-pro"]
+INSIGHTS_TIMEOUT = 20
+INSIGHTS_HEDGING = hedging_from_env("INSIGHTS")  # INSIGHTS_HEDGE / INSIGHTS_HEDGE_DELAY_S
 
-# List of models to try
-MODELS_TO_TRY = ["gemini-2.5-flash", "gemini-2.0-flash-exp", GEMINI_MODEL, "gemini-1.5-flash", "gemini-pro"]
-
-def get_chat_model(model_name):
-    try:
-        return ChatGoogleGenerativeAI(model=model_name, temperature=0.7)
-    except Exception:
-        return None
+# Vendors asking about the same city/day at once share one Gemini call
+insights_flight = SingleFlight("vendor_insights")
 
 def clean_ai_output(text: str) -> str:
     """
@@ -58,34 +59,24 @@ Notes:
 """
     )
 
-    # Limit models to avoid long timeouts if quota is dead
-    FAST_MODELS = ["gemini-1.5-flash", "gemini-pro"]
-    
-    for model_name in FAST_MODELS:
-        try:
-            # Check for API key before trying
-            if not os.environ.get("GOOGLE_API_KEY"):
-                return "AI Insights unavailable (Missing API Key)."
+    # Check for API key before trying
+    if requires_api_key() and not os.environ.get("GOOGLE_API_KEY"):
+        return "AI Insights unavailable (Missing API Key)."
 
-            chat_model = get_chat_model(model_name)
-            if not chat_model:
-                continue
-            
-            # Reduce timeout to fail fast if model is unresponsive
-            # Add timeout to invoke if possible, otherwise rely on fast failure
-            try:
-                response = chat_model.invoke([system_msg, user_msg])
-                if response and response.content:
-                    return clean_ai_output(response.content)
-            except Exception as inner_e:
-                print(f"⚠️ Model invoke failed for {model_name}: {inner_e}")
-                if "RESOURCE_EXHAUSTED" in str(inner_e):
-                    return "AI Insights temporarily unavailable (Quota Limit Reached)."
-                continue
+    try:
+        return insights_flight.do(user_msg.content, _ask_vendor_insights, system_msg, user_msg)
+    except DeadlineExceededError:
+        return "AI Insights unavailable at the moment. Please consult local guides."
 
-        except Exception as e:
-            print(f"⚠️ Model {model_name} failed: {e}")
-            continue
+def _ask_vendor_insights(system_msg, user_msg) -> str:
+    try:
+        content = router.invoke(FAST_MODELS, [system_msg, user_msg], temperature=0.7, timeout=INSIGHTS_TIMEOUT,
+                                priority=BACKGROUND, **INSIGHTS_HEDGING)
+        return clean_ai_output(content)
+    except LLMOverloadedError:
+        return "AI Insights temporarily unavailable (Server Busy). Please try again shortly."
+    except AllModelsFailedError as e:
+        if e.quota_exhausted:
+            return "AI Insights temporarily unavailable (Quota Limit Reached)."
 
     return "AI Insights unavailable at the moment. Please consult local guides."
-
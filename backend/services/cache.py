@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with a per-entry TTL.
+
+    When `path` is given, entries are written through to a small SQLite file so
+    a restarted process starts warm; values must be JSON-serialisable. The
+    in-memory layer is bounded by `maxsize`; the disk layer only drops expired rows.
+    """
+
+    def __init__(self, maxsize=1024, ttl=3600, path=None, name="cache"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.name = name
+
+        self._data = OrderedDict()   # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._db = None
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, expires_at REAL, value TEXT)"
+                )
+                self._db.execute("DELETE FROM entries WHERE expires_at < ?", (time.time(),))
+                self._db.commit()
+            except Exception as e:
+                print(f"⚠️ {name}: disk cache disabled ({e})")
+                self._db = None
+
+    # ---------------- public API ----------------
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+
+            value, expires_at = self._disk_get(key, now)
+            if value is not _MISSING:
+                self._store(key, value, expires_at)
+                self.hits += 1
+                return value
+
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._store(key, value, expires_at)
+            self._disk_set(key, value, expires_at)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM entries")
+                self._db.commit()
+
+    def keys(self):
+        """Live in-memory keys, least recently used first."""
+        now = time.time()
+        with self._lock:
+            return [k for k, (expires_at, _) in self._data.items() if expires_at > now]
+
+    def items(self):
+        """Live in-memory (key, value) pairs without touching LRU order or counters."""
+        now = time.time()
+        with self._lock:
+            return [(k, v) for k, (expires_at, v) in self._data.items() if expires_at > now]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+    # ---------------- internals (caller holds self._lock) ----------------
+    def _store(self, key, value, expires_at):
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def _disk_get(self, key, now):
+        if self._db is None:
+            return _MISSING, None
+        try:
+            row = self._db.execute(
+                "SELECT expires_at, value FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        except Exception as e:
+            print(f"⚠️ {self.name}: disk read failed ({e})")
+            return _MISSING, None
+        if not row or row[0] <= now:
+            return _MISSING, None
+        return json.loads(row[1]), row[0]
+
+    def _disk_set(self, key, value, expires_at):
+        if self._db is None:
+            return
+        try:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries (key, expires_at, value) VALUES (?, ?, ?)",
+                (key, expires_at, json.dumps(value, ensure_ascii=False))
+            )
+            self._db.commit()
+        except Exception as e:
+            print(f"⚠️ {self.name}: disk write failed ({e})")
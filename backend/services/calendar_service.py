@@ -1,11 +1,21 @@
 import os
-from datetime import datetime, timedelta
+import threading
+from datetime import datetime, timedelta, date as date_type
+
+import numpy as np
 from googleapiclient.discovery import build
 from google.oauth2 import service_account
 
+from services.festival_index import FestivalIndex
+
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 SERVICE_ACCOUNT_FILE = os.path.join(BASE_DIR, "data", "calender.json")
 CALENDAR_ID = "en.indian#holiday@group.v.calendar.google.com"
+CALENDAR_SNAPSHOT = os.path.join(BASE_DIR, "data", "calendar_snapshot.json")
+CALENDAR_TTL = int(os.getenv("CALENDAR_TTL_HOURS", "24")) * 3600
+
+NEARBY_DAYS = 2          # a festival within ±2 days makes a day "nearby"
+MAX_RANGE_DAYS = 366     # bulk flag requests are capped at a year
 
 service = None
 
@@ -19,44 +29,141 @@ if os.path.exists(SERVICE_ACCOUNT_FILE):
     except Exception as e:
         print("⚠️ Calendar init failed:", e)
 
-def get_calendar_events(start_date: datetime, end_date: datetime):
+# --------------------------------------------------
+# 📅 Year-level event cache
+# --------------------------------------------------
+def fetch_year_events(year: int):
+    """All events of a calendar year, or None when the calendar is unavailable."""
     if not service:
-        return {}
+        return None
 
     events = service.events().list(
         calendarId=CALENDAR_ID,
-        timeMin=start_date.isoformat() + "Z",
-        timeMax=end_date.isoformat() + "Z",
+        timeMin=datetime(year, 1, 1).isoformat() + "Z",
+        timeMax=datetime(year + 1, 1, 1).isoformat() + "Z",
         singleEvents=True,
         orderBy="startTime"
     ).execute().get("items", [])
 
+    # First event of a day wins (results are ordered by start time)
+    festivals = {}
+    for e in events:
+        day = e.get("start", {}).get("date") or e.get("start", {}).get("dateTime", "")[:10]
+        if day:
+            festivals.setdefault(day, e.get("summary", ""))
+    return festivals
+
+
+# Each year is fetched once, refreshed in the background after CALENDAR_TTL_HOURS,
+# and snapshotted to disk so restarts and offline runs skip the API. The
+# suggestion orchestrator's festival lookups share this index.
+calendar_index = FestivalIndex(fetch_year_events, snapshot_path=CALENDAR_SNAPSHOT, ttl=CALENDAR_TTL)
+
+
+def get_calendar_events(start_date: datetime, end_date: datetime):
+    """{"YYYY-MM-DD": event} in the range; a whole single year returns the shared cached dict."""
+    if (start_date.year == end_date.year and (start_date.month, start_date.day) == (1, 1)
+            and (end_date.month, end_date.day) == (12, 31)):
+        return calendar_index.events_for_year(start_date.year)
+
+    start_key, end_key = start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
+    events = {}
+    for year in range(start_date.year, end_date.year + 1):
+        for day, name in calendar_index.events_for_year(year).items():
+            if start_key <= day <= end_key:
+                events[day] = name
+    return events
+
+
+# --------------------------------------------------
+# 🚩 Day-of-year flag tables
+# --------------------------------------------------
+# Index = day of year - 1. Tables are rebuilt whenever the year's events dict
+# changes (a refresh swaps in a new dict), so a lookup is one array index.
+_SEASON_BY_MONTH = [None,
+    "Winter", "Winter", "Summer", "Summer", "Summer", "Monsoon",
+    "Monsoon", "Monsoon", "Monsoon", "Post-Monsoon", "Post-Monsoon", "Winter"]
+
+_flag_tables = {}   # year -> (events dict, {"festival", "nearby", "holiday"} arrays)
+_flag_lock = threading.Lock()
+
+
+def _build_flag_table(year: int, event_dates: dict) -> dict:
+    first = date_type(year, 1, 1)
+    days = (date_type(year + 1, 1, 1) - first).days
+
+    festival = np.zeros(days, dtype=bool)
+    for day in event_dates:
+        try:
+            parsed = datetime.strptime(day[:10], "%Y-%m-%d").date()
+        except ValueError:
+            continue
+        if parsed.year == year:
+            festival[(parsed - first).days] = True
+
+    # Any festival within the ±NEARBY_DAYS window, excluding festival days themselves
+    padded = np.pad(festival, NEARBY_DAYS)
+    window = np.zeros(days, dtype=bool)
+    for shift in range(2 * NEARBY_DAYS + 1):
+        window |= padded[shift:shift + days]
+
     return {
-        (e["start"].get("date") or e["start"].get("dateTime", "")[:10]):
-        e.get("summary", "")
-        for e in events
-        if "start" in e
+        "festival": festival,
+        "nearby": window & ~festival,
+        "holiday": (np.arange(days) + first.weekday()) % 7 >= 5,
     }
 
-def generate_calendar_flags(date: datetime, event_dates: dict):
-    date_str = date.strftime("%Y-%m-%d")
 
-    festival_day = date_str in event_dates
-    nearby_festival_day = any(
-        (date + timedelta(days=i)).strftime("%Y-%m-%d") in event_dates
-        for i in range(-2, 3)
-    ) and not festival_day
+def _flags_for_year(year: int, event_dates: dict = None) -> dict:
+    if event_dates is None:
+        event_dates = calendar_index.events_for_year(year)
+    elif event_dates is not calendar_index.cached(year):
+        # Caller-supplied events: build a one-off table
+        return _build_flag_table(year, event_dates)
+
+    with _flag_lock:
+        entry = _flag_tables.get(year)
+        if entry is not None and entry[0] is event_dates:
+            return entry[1]
+    table = _build_flag_table(year, event_dates)
+    with _flag_lock:
+        _flag_tables[year] = (event_dates, table)
+    return table
+
 
-    season = (
-        "Winter" if date.month in [12, 1, 2]
-        else "Summer" if date.month in [3, 4, 5]
-        else "Monsoon" if date.month in [6, 7, 8, 9]
-        else "Post-Monsoon"
-    )
+def season_for(day) -> str:
+    return _SEASON_BY_MONTH[day.month]
 
+
+def _flags_at(table: dict, day) -> dict:
+    index = day.timetuple().tm_yday - 1
     return {
-        "Festival_Day": festival_day,
-        "Nearby_Festival_Day": nearby_festival_day,
-        "Season": season,
-        "Holiday": date.weekday() >= 5
+        "Festival_Day": bool(table["festival"][index]),
+        "Nearby_Festival_Day": bool(table["nearby"][index]),
+        "Season": season_for(day),
+        "Holiday": bool(table["holiday"][index])
     }
+
+
+def generate_calendar_flags(date: datetime, event_dates: dict = None):
+    """
+    Flags for one day. `event_dates` is the year's events as returned by
+    get_calendar_events(); when omitted (or the cached dict) the precomputed
+    table for the year answers with a single index.
+    """
+    return _flags_at(_flags_for_year(date.year, event_dates), date)
+
+
+def calendar_flags_range(start_date: datetime, end_date: datetime):
+    """Flags for every day from start_date to end_date inclusive (at most MAX_RANGE_DAYS)."""
+    days = (end_date - start_date).days + 1
+    if days <= 0:
+        return []
+    if days > MAX_RANGE_DAYS:
+        raise ValueError(f"Date range is limited to {MAX_RANGE_DAYS} days")
+
+    result = []
+    for offset in range(days):
+        day = start_date + timedelta(days=offset)
+        result.append({"Date": day.strftime("%Y-%m-%d"), **_flags_at(_flags_for_year(day.year), day)})
+    return result
@@ -1,25 +1,98 @@
+import os
+import threading
+
 import pandas as pd
+from rapidfuzz import fuzz, process
+
 from config import DATA_PATH
+from services.reloading_index import ReloadingFileIndex
+
+PLACE_FIELDS = ['Name Place', 'Rating', 'Rank_in_City']
+PLACES_PER_CITY = int(os.getenv("PLACES_PER_CITY", "20"))      # longest top-N list kept per key
+CITY_MATCH_THRESHOLD = int(os.getenv("CITY_MATCH_THRESHOLD", "85"))
+DEFAULT_CITY = "mumbai"
+
+
+def normalize_name(text) -> str:
+    return " ".join(str(text).lower().split())
+
+
+class PlacesIndex:
+    """
+    Places pre-ranked by Weighted_Score, keyed by normalized (city, state) and
+    by city alone, so a lookup is a dict hit. Misspelled city names are resolved
+    with rapidfuzz once and remembered for the lifetime of this index.
+    """
+
+    def __init__(self, by_city_state=None, by_city=None, ranked_cities=None):
+        self.by_city_state = by_city_state or {}
+        self.by_city = by_city or {}
+        self.cities = list(self.by_city)
+        self.ranked_cities = ranked_cities or []   # [(City, State)], most places first
+        self._resolved = {}
+        self._lock = threading.Lock()
+
+    def resolve_city(self, city: str):
+        """Closest known city for a normalized name, or None."""
+        if city in self.by_city:
+            return city
+        with self._lock:
+            if city in self._resolved:
+                return self._resolved[city]
+
+        match = process.extractOne(city, self.cities, scorer=fuzz.ratio, score_cutoff=CITY_MATCH_THRESHOLD)
+        resolved = match[0] if match else None
+        with self._lock:
+            if len(self._resolved) < 10000:
+                self._resolved[city] = resolved
+        return resolved
+
+
+def build_places_index(path) -> PlacesIndex:
+    df = pd.read_csv(path)
+    df.columns = [col.strip() for col in df.columns]
+    df = df.sort_values(by="Weighted_Score", ascending=False, kind="stable")
+    df["_city"] = df["City"].map(normalize_name)
+    df["_state"] = df["State"].map(normalize_name)
+
+    def top(group):
+        return group.head(PLACES_PER_CITY)[PLACE_FIELDS].to_dict(orient='records')
+
+    # groupby keeps the score order within each group
+    by_city_state = {key: top(group) for key, group in df.groupby(["_city", "_state"], sort=False)}
+    by_city = {key: top(group) for key, group in df.groupby("_city", sort=False)}
+    counts = df.groupby(["_city", "_state"], sort=False).agg(City=("City", "first"), State=("State", "first"), n=("City", "size"))
+    ranked_cities = list(counts.sort_values("n", ascending=False, kind="stable")[["City", "State"]].itertuples(index=False, name=None))
+    return PlacesIndex(by_city_state, by_city, ranked_cities)
+
+
+# 🔄 Rebuilt on a background thread when the CSV changes on disk; requests keep the old index meanwhile
+places_index = ReloadingFileIndex(DATA_PATH, build_places_index, default=PlacesIndex(), name="places dataset")
+
+
+def get_top_cities(limit=20):
+    """(City, State) pairs with the most places in the dataset."""
+    return places_index.get().ranked_cities[:limit]
 
-df = pd.read_csv(DATA_PATH)
-df.columns = [col.strip() for col in df.columns]
 
 def get_top_places(city: str, state: str, top_n=5):
-    # 1. Try Exact Match (City + State)
-    mask = (df['City'].str.lower() == city.lower()) & (df['State'].str.lower() == state.lower())
-    city_data = df[mask]
-
-    # 2. Relaxed Match (City only)
-    if city_data.empty:
-        city_data = df[df['City'].str.lower() == city.lower()]
-    
-    # 3. Fallback to Mumbai (Default) if still empty
-    if city_data.empty:
-        print(f"⚠️ City '{city}' not found in dataset. Defaulting to Mumbai.")
-        city_data = df[df['City'].str.lower() == "mumbai"]
+    index = places_index.get()
+    city_key, state_key = normalize_name(city), normalize_name(state)
+
+    # 1. Exact match (City + State), then 2. relaxed match (City only)
+    places = index.by_city_state.get((city_key, state_key)) or index.by_city.get(city_key)
 
-    if city_data.empty:
-         return []
+    # 3. Fuzzy match for misspelled cities
+    if not places:
+        resolved = index.resolve_city(city_key)
+        if resolved:
+            print(f"🔎 City '{city}' resolved to '{resolved}'.")
+            places = index.by_city_state.get((resolved, state_key)) or index.by_city[resolved]
+
+    # 4. Fallback to Mumbai (Default) if still empty
+    if not places:
+        print(f"⚠️ City '{city}' not found in dataset. Defaulting to Mumbai.")
+        places = index.by_city.get(DEFAULT_CITY, [])
 
-    top_places = city_data.sort_values(by="Weighted_Score", ascending=False).head(top_n)
-    return top_places[['Name Place', 'Rating', 'Rank_in_City']].to_dict(orient='records')
+    # Copies, so callers can't modify the shared index
+    return [dict(place) for place in places[:top_n]]
@@ -0,0 +1,75 @@
+import os
+import math
+import functools
+import time
+import contextvars
+from contextlib import contextmanager
+
+# time.monotonic() by which the current request must answer, or None (no budget)
+_deadline = contextvars.ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceededError(TimeoutError):
+    """Raised when a step is skipped because the request budget is spent."""
+
+
+def budget_from_env(name: str, default: float) -> float:
+    """Route budget in seconds from `name`; 0 or a negative value disables it."""
+    return float(os.environ.get(name, str(default)))
+
+
+@contextmanager
+def budget(seconds):
+    """
+    Bound everything inside the block to `seconds` from now. Nested budgets can
+    only shrink the enclosing one; a falsy `seconds` keeps the outer deadline.
+    """
+    current = _deadline.get()
+    if seconds and seconds > 0:
+        new = time.monotonic() + seconds
+        if current is None or new < current:
+            current = new
+    token = _deadline.set(current)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def with_budget(seconds):
+    """Decorator form of budget() for Flask views."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with budget(seconds):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def remaining():
+    """Seconds left in the current budget (inf when there is none)."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return math.inf
+    return max(0.0, deadline - time.monotonic())
+
+
+def expired() -> bool:
+    return remaining() <= 0
+
+
+def clamp_timeout(timeout, minimum=1):
+    """
+    Shrink a per-call timeout to the remaining budget. Rounded up to whole
+    seconds so pooled clients keyed on the timeout stay few.
+    """
+    left = remaining()
+    if left >= timeout:
+        return timeout
+    return max(minimum, math.ceil(left))
+
+
+def submit(pool, fn, *args, **kwargs):
+    """pool.submit() that carries the caller's deadline into the worker thread."""
+    return pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
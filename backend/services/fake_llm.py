@@ -0,0 +1,77 @@
+import os
+import json
+import time
+import random
+import threading
+
+# --------------------------------------------------
+# 🧪 Fake backend settings (LLM_BACKEND=fake)
+# --------------------------------------------------
+LATENCY_MS = float(os.environ.get("FAKE_LLM_LATENCY_MS", "800"))
+JITTER_MS = float(os.environ.get("FAKE_LLM_JITTER_MS", "400"))
+TOKEN_MS = float(os.environ.get("FAKE_LLM_TOKEN_MS", "20"))            # per streamed chunk
+FAILURE_RATE = float(os.environ.get("FAKE_LLM_FAILURE_RATE", "0"))     # 503 UNAVAILABLE
+QUOTA_RATE = float(os.environ.get("FAKE_LLM_QUOTA_RATE", "0"))         # 429 RESOURCE_EXHAUSTED
+DEAD_MODELS = {m.strip() for m in os.environ.get("FAKE_LLM_DEAD_MODELS", "").split(",") if m.strip()}
+
+_random = random.Random(os.environ.get("FAKE_LLM_SEED"))
+_random_lock = threading.Lock()
+
+FAKE_ADVISORY = {"toppings": ["Fried Onions", "Coriander"], "addons": ["Extra Sauce", "Papad"]}
+FAKE_TEXT = (
+    "Here are a few ideas for your stall. Keep the menu short and price it clearly. "
+    "Serve the busiest hours near offices and colleges, and promote one seasonal special each week."
+)
+
+
+class FakeMessage:
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeChatModel:
+    """
+    Stand-in for ChatGoogleGenerativeAI with the same invoke()/stream() surface.
+    Sleeps for a configurable latency and fails with Gemini-style error strings,
+    so the router, limiter and caches can be exercised and benchmarked offline.
+    """
+
+    def __init__(self, model, temperature=0.5, timeout=30):
+        self.model = model
+        self.temperature = temperature
+        self.timeout = timeout
+
+    def invoke(self, messages):
+        self._wait_and_maybe_fail()
+        return FakeMessage(self._answer(messages))
+
+    def stream(self, messages):
+        self._wait_and_maybe_fail()
+        for word in self._answer(messages).split(" "):
+            time.sleep(TOKEN_MS / 1000)
+            yield FakeMessage(word + " ")
+
+    def _wait_and_maybe_fail(self):
+        if self.model in DEAD_MODELS:
+            raise RuntimeError(f"404 NOT_FOUND: models/{self.model} is not found")
+
+        with _random_lock:
+            latency = max(0.0, LATENCY_MS + _random.uniform(-JITTER_MS, JITTER_MS)) / 1000
+            roll = _random.random()
+
+        if latency > self.timeout:
+            time.sleep(self.timeout)
+            raise TimeoutError(f"Deadline of {self.timeout}s exceeded")
+        time.sleep(latency)
+
+        if roll < QUOTA_RATE:
+            raise RuntimeError("429 RESOURCE_EXHAUSTED: quota exceeded (fake)")
+        if roll < QUOTA_RATE + FAILURE_RATE:
+            raise RuntimeError("503 UNAVAILABLE: model overloaded (fake)")
+
+    @staticmethod
+    def _answer(messages):
+        prompt = " ".join(str(getattr(m, "content", m)) for m in messages)
+        if "JSON" in prompt:
+            return json.dumps(FAKE_ADVISORY)
+        return FAKE_TEXT
@@ -0,0 +1,129 @@
+import os
+import json
+import time
+import threading
+from datetime import datetime
+
+
+class FestivalIndex:
+    """
+    Year-keyed festival lookup: {year: {"YYYY-MM-DD": festival}}.
+
+    Each year is fetched once through `fetch_year(year)` and then served from
+    memory. Entries older than `ttl` seconds are refreshed on a background
+    thread while the stale data keeps answering. Successful fetches are written
+    to `snapshot_path` so cold starts and offline runs skip the network.
+    `fetch_year` returns a dict of events, or None when the source is unavailable.
+    """
+
+    def __init__(self, fetch_year, snapshot_path=None, ttl=24 * 3600, retry_after=300):
+        self.fetch_year = fetch_year
+        self.snapshot_path = snapshot_path
+        self.ttl = ttl
+        self.retry_after = retry_after
+
+        self._years = {}          # year -> (loaded_at, events)
+        self._refreshing = set()
+        self._year_locks = {}     # year -> Lock serializing the cold load
+        self._lock = threading.Lock()
+        self._load_snapshot()
+
+    # ---------------- public API ----------------
+    def lookup(self, day):
+        """Festival name for `day` (date, datetime or 'YYYY-MM-DD'), or None."""
+        if isinstance(day, str):
+            day = datetime.strptime(day[:10], "%Y-%m-%d")
+        return self.events_for_year(day.year).get(day.strftime("%Y-%m-%d"))
+
+    def events_for_year(self, year: int) -> dict:
+        entry = self._years.get(year)
+        if entry is None:
+            return self._load_cold(year)
+
+        loaded_at, events = entry
+        if time.time() - loaded_at > self.ttl:
+            self._refresh_in_background(year)
+        return events
+
+    def cached(self, year: int):
+        """The year's events if already loaded (never fetches), else None."""
+        entry = self._years.get(year)
+        return entry[1] if entry else None
+
+    def refresh(self, year: int) -> dict:
+        return self._refresh(year)
+
+    # ---------------- loading ----------------
+    def _load_cold(self, year: int) -> dict:
+        # Concurrent first callers for a year wait for one fetch instead of each calling the API
+        with self._lock:
+            year_lock = self._year_locks.setdefault(year, threading.Lock())
+        with year_lock:
+            entry = self._years.get(year)
+            if entry is not None:
+                return entry[1]
+            return self._refresh(year)
+
+    def _refresh(self, year: int) -> dict:
+        try:
+            events = self.fetch_year(year)
+        except Exception as e:
+            print(f"⚠️ Festival fetch for {year} failed: {e}")
+            events = None
+
+        with self._lock:
+            if events is None:
+                # Keep serving what we have; otherwise cache "nothing" and retry later
+                previous = self._years.get(year)
+                stale_events = previous[1] if previous else {}
+                self._years[year] = (time.time() - self.ttl + self.retry_after, stale_events)
+                return stale_events
+
+            self._years[year] = (time.time(), events)
+            self._save_snapshot()
+        return events
+
+    def _refresh_in_background(self, year: int):
+        with self._lock:
+            if year in self._refreshing:
+                return
+            self._refreshing.add(year)
+
+        def run():
+            try:
+                self._refresh(year)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(year)
+
+        threading.Thread(target=run, name=f"festival-refresh-{year}", daemon=True).start()
+
+    # ---------------- snapshot ----------------
+    def _load_snapshot(self):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for year, entry in data.items():
+                self._years[int(year)] = (entry["fetched_at"], entry["events"])
+        except Exception as e:
+            print(f"⚠️ Could not read festival snapshot: {e}")
+
+    def _save_snapshot(self):
+        # Caller holds self._lock
+        if not self.snapshot_path:
+            return
+        data = {
+            str(year): {"fetched_at": loaded_at, "events": events}
+            for year, (loaded_at, events) in self._years.items()
+            if events  # never persist "unavailable" placeholders
+        }
+        try:
+            os.makedirs(os.path.dirname(self.snapshot_path), exist_ok=True)
+            tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception as e:
+            print(f"⚠️ Could not write festival snapshot: {e}")
@@ -0,0 +1,104 @@
+import sys
+import time
+import importlib
+import threading
+
+# --------------------------------------------------
+# 💤 Lazy module loading
+# --------------------------------------------------
+# Heavy dependencies (sklearn, langchain, torch/transformers, googleapiclient,
+# TextBlob) are only imported when a route first touches them, or by the
+# background warm-up. Import times are recorded for the startup report.
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._seconds = None
+        self._error = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def load(self):
+        if self._module is not None:
+            return self._module
+        with self._lock:
+            if self._module is None:
+                start = time.perf_counter()
+                try:
+                    self._module = importlib.import_module(self._name)
+                except Exception as e:
+                    self._error = str(e)
+                    raise
+                finally:
+                    self._seconds = time.perf_counter() - start
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def lazy_import(name) -> LazyModule:
+    """Return a shared placeholder that imports `name` on first attribute access."""
+    with _registry_lock:
+        module = _registry.get(name)
+        if module is None:
+            module = _registry[name] = LazyModule(name)
+        return module
+
+
+def warm_up(names=None):
+    """Import the given (default: all registered) lazy modules, in registration order."""
+    with _registry_lock:
+        modules = [_registry[n] for n in (names or list(_registry)) if n in _registry]
+    for module in modules:
+        try:
+            module.load()
+        except Exception as e:
+            print(f"⚠️ Warm-up import of {module._name} failed: {e}")
+
+
+def start_warm_up(names=None) -> threading.Thread:
+    def run():
+        start = time.perf_counter()
+        warm_up(names)
+        print(f"🔥 Warm-up finished in {time.perf_counter() - start:.1f} s")
+        for row in import_report():
+            if row["seconds"] is not None:
+                print(f"   {row['seconds']:7.2f} s  {row['module']}")
+
+    thread = threading.Thread(target=run, name="lazy-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def import_report() -> list:
+    """
+    Per-module import cost, slowest first. A module's time only includes
+    dependencies that were not already imported by an earlier module. A module
+    imported outside the lazy loader (eagerly at boot, or as a dependency of
+    another module) is reported as loaded with "indirect" set and no time.
+    """
+    with _registry_lock:
+        modules = list(_registry.values())
+    rows = []
+    for m in modules:
+        indirect = not m.loaded and m._error is None and m._name in sys.modules
+        rows.append({
+            "module": m._name,
+            "loaded": m.loaded or indirect,
+            "indirect": indirect,
+            "seconds": round(m._seconds, 3) if m._seconds is not None else None,
+            "error": m._error,
+        })
+    return sorted(rows, key=lambda r: r["seconds"] or 0.0, reverse=True)
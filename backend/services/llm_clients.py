@@ -0,0 +1,70 @@
+import os
+import threading
+
+from services.lazy_loader import lazy_import
+
+# 💤 imported on the first client request
+langchain_google_genai = lazy_import("langchain_google_genai")
+fake_llm = lazy_import("services.fake_llm")
+
+# 🔌 "gemini" (default) or "fake" for offline runs and benchmarks (see services/fake_llm.py)
+LLM_BACKEND = os.environ.get("LLM_BACKEND", "gemini").lower()
+
+_BACKENDS = {
+    "gemini": lambda model, temperature, timeout: langchain_google_genai.ChatGoogleGenerativeAI(
+        model=model, temperature=temperature, timeout=timeout
+    ),
+    "fake": lambda model, temperature, timeout: fake_llm.FakeChatModel(model, temperature, timeout),
+}
+
+if LLM_BACKEND not in _BACKENDS:
+    raise RuntimeError(f"❌ Unknown LLM_BACKEND '{LLM_BACKEND}' (expected one of {list(_BACKENDS)})")
+
+
+def requires_api_key() -> bool:
+    """Whether the configured backend needs a Google API key."""
+    return LLM_BACKEND == "gemini"
+
+# --------------------------------------------------
+# ♻️ Process-wide Gemini client pool
+# --------------------------------------------------
+# Clients are keyed by (model, temperature, timeout) and shared across requests
+# and Flask worker threads, so each one keeps its underlying connection alive
+# instead of redoing client setup and the handshake per call.
+_clients = {}
+_lock = threading.Lock()
+_created = 0
+_reused = 0
+
+
+def get_client(model_name, temperature=0.5, timeout=30):
+    global _created, _reused
+    key = (model_name, temperature, timeout)
+
+    with _lock:
+        client = _clients.get(key)
+        if client is not None:
+            _reused += 1
+            return client
+
+        client = _BACKENDS[LLM_BACKEND](model_name, temperature, timeout)
+        _clients[key] = client
+        _created += 1
+        return client
+
+
+def clear_clients():
+    with _lock:
+        _clients.clear()
+
+
+def pool_stats() -> dict:
+    with _lock:
+        total = _created + _reused
+        return {
+            "backend": LLM_BACKEND,
+            "clients": len(_clients),
+            "created": _created,
+            "reused": _reused,
+            "reuse_rate": round(_reused / total, 3) if total else 0.0,
+        }
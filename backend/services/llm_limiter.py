@@ -0,0 +1,161 @@
+import os
+import time
+import heapq
+import itertools
+import threading
+from contextlib import contextmanager
+
+# --------------------------------------------------
+# 🚦 Priority classes (lower value is admitted first)
+# --------------------------------------------------
+INTERACTIVE = 0   # chat
+STANDARD = 1      # menu suggestions
+BACKGROUND = 2    # tourism insights, summaries, precompute jobs
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", STANDARD: "standard", BACKGROUND: "background"}
+
+
+class LLMOverloadedError(Exception):
+    """Raised when a call is shed instead of queued (queue full or wait too long)."""
+
+    def __init__(self, reason):
+        self.reason = reason
+        super().__init__(f"LLM capacity exhausted ({reason})")
+
+
+class AdmissionController:
+    """
+    Shared gate in front of every outbound LLM call: at most `max_concurrent`
+    calls run at once, starts are limited by a token bucket (`rate` per second,
+    `burst` tokens; rate 0 disables it), and waiters are served by priority then
+    arrival. When `max_queue` callers are already waiting, the newest waiter of
+    the lowest priority is shed to make room for a higher-priority caller;
+    otherwise the new caller is. Calls are also shed with LLMOverloadedError
+    when a caller would wait longer than `max_wait` seconds.
+    """
+
+    def __init__(self, max_concurrent=8, rate=0.0, burst=10, max_queue=32, max_wait=5.0):
+        self.max_concurrent = max_concurrent
+        self.rate = rate
+        self.burst = burst
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+
+        self._cond = threading.Condition()
+        self._waiting = []            # heap of (priority, seq)
+        self._evicted = set()         # waiters shed to make room for higher priorities
+        self._seq = itertools.count()
+        self._active = 0
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+
+        self.admitted = {name: 0 for name in PRIORITY_NAMES.values()}
+        self.shed_queue_full = 0
+        self.shed_preempted = 0
+        self.shed_timeout = 0
+
+    @contextmanager
+    def admit(self, priority=STANDARD, timeout=None):
+        self.acquire(priority, timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def acquire(self, priority=STANDARD, timeout=None):
+        wait_limit = self.max_wait if timeout is None else min(timeout, self.max_wait)
+        deadline = time.monotonic() + max(0.0, wait_limit)
+
+        with self._cond:
+            if len(self._waiting) >= self.max_queue:
+                victim = max(self._waiting) if self._waiting else None
+                if victim is None or victim[0] <= priority:
+                    self.shed_queue_full += 1
+                    raise LLMOverloadedError("queue full")
+                self._waiting.remove(victim)
+                heapq.heapify(self._waiting)
+                self._evicted.add(victim)
+                self._cond.notify_all()
+
+            entry = (priority, next(self._seq))
+            heapq.heappush(self._waiting, entry)
+            try:
+                while True:
+                    if entry in self._evicted:
+                        self._evicted.discard(entry)
+                        self.shed_preempted += 1
+                        raise LLMOverloadedError("queue full, preempted by a higher-priority call")
+
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._waiting[0] == entry and self._active < self.max_concurrent and self._tokens >= 1:
+                        heapq.heappop(self._waiting)
+                        self._active += 1
+                        if self.rate:
+                            self._tokens -= 1
+                        self.admitted[PRIORITY_NAMES.get(priority, "standard")] += 1
+                        self._cond.notify_all()
+                        return
+
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self.shed_timeout += 1
+                        raise LLMOverloadedError("timed out waiting for a slot")
+
+                    wait = remaining
+                    if self.rate and self._tokens < 1:
+                        wait = min(wait, (1 - self._tokens) / self.rate)
+                    self._cond.wait(wait)
+            except BaseException:
+                if entry in self._waiting:
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+                    self._cond.notify_all()
+                raise
+
+    def try_acquire(self, priority=BACKGROUND) -> bool:
+        """Take a slot only if one is free right now and nobody is queued for it."""
+        with self._cond:
+            self._refill(time.monotonic())
+            if self._waiting or self._active >= self.max_concurrent or self._tokens < 1:
+                return False
+            self._active += 1
+            if self.rate:
+                self._tokens -= 1
+            self.admitted[PRIORITY_NAMES.get(priority, "standard")] += 1
+            return True
+
+    def release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def _refill(self, now):
+        if not self.rate:
+            self._tokens = float(self.burst)
+            return
+        self._tokens = min(float(self.burst), self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "active": self._active,
+                "queued": len(self._waiting),
+                "max_concurrent": self.max_concurrent,
+                "rate_per_second": self.rate,
+                "admitted": dict(self.admitted),
+                "shed_queue_full": self.shed_queue_full,
+                "shed_preempted": self.shed_preempted,
+                "shed_timeout": self.shed_timeout,
+            }
+
+
+# One controller per process, shared by every LLM call site
+limiter = AdmissionController(
+    max_concurrent=int(os.environ.get("LLM_MAX_CONCURRENCY", "8")),
+    rate=float(os.environ.get("LLM_RATE_PER_SECOND", "0")),
+    burst=int(os.environ.get("LLM_BURST", "10")),
+    max_queue=int(os.environ.get("LLM_MAX_QUEUE", "32")),
+    max_wait=float(os.environ.get("LLM_QUEUE_TIMEOUT_SECONDS", "5")),
+)
@@ -0,0 +1,436 @@
+import os
+import math
+import time
+import queue
+import weakref
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from services import deadline
+from services.llm_clients import get_client
+from services.llm_limiter import limiter, LLMOverloadedError, STANDARD, BACKGROUND  # noqa: F401 (re-exported)
+
+# --------------------------------------------------
+# ⚙️ Circuit breaker settings
+# --------------------------------------------------
+FAILURE_THRESHOLD = 3        # consecutive failures before a model's circuit opens
+COOLDOWN_SECONDS = 60        # how long an open circuit waits before a half-open probe
+DEAD_MODEL_COOLDOWN = 3600   # not-found / deprecated models are retried far less often
+WINDOW = 20                  # recent calls kept per model for failure rate and latency
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+# --------------------------------------------------
+# 🏁 Hedging settings
+# --------------------------------------------------
+HEDGE_DEFAULT_DELAY = 2.0    # used until a model has latency history
+HEDGE_PERCENTILE = 0.9       # hedge once the running call is slower than this
+# Every hedged call holds a limiter slot until it finishes, so at most
+# LLM_MAX_CONCURRENCY of them run at once and this pool never queues behind abandoned calls
+_hedge_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("LLM_HEDGE_WORKERS", str(limiter.max_concurrent))),
+    thread_name_prefix="llm-hedge"
+)
+
+
+def hedging_from_env(prefix: str) -> dict:
+    """
+    invoke() keyword arguments from <prefix>_HEDGE (true/false) and
+    <prefix>_HEDGE_DELAY_S (seconds; unset means the model's observed p90).
+    """
+    delay = os.environ.get(f"{prefix}_HEDGE_DELAY_S")
+    return {
+        "hedge": os.environ.get(f"{prefix}_HEDGE", "False").lower() == "true",
+        "hedge_delay": float(delay) if delay else None,
+    }
+
+
+class AllModelsFailedError(Exception):
+    """Raised when no candidate model produced a usable response."""
+
+    def __init__(self, errors):
+        self.errors = errors  # [(model_name, error_message)]
+        super().__init__("; ".join(f"{m}: {e}" for m, e in errors) or "No healthy models available")
+
+    @property
+    def quota_exhausted(self) -> bool:
+        return any("RESOURCE_EXHAUSTED" in e for _, e in self.errors)
+
+
+_BUDGET_SPENT = ("deadline", "request budget exhausted")
+
+
+def _check_budget():
+    if deadline.expired():
+        raise AllModelsFailedError([_BUDGET_SPENT])
+
+
+def _once(fn):
+    lock = threading.Lock()
+    called = []
+
+    def wrapper():
+        with lock:
+            if called:
+                return
+            called.append(True)
+        fn()
+    return wrapper
+
+
+def _is_timeout(error) -> bool:
+    message = str(error).lower()
+    return isinstance(error, TimeoutError) or any(
+        marker in message for marker in ("timeout", "timed out", "deadline", "504")
+    )
+
+
+def _chunk_text(chunk) -> str:
+    content = getattr(chunk, "content", chunk)
+    if isinstance(content, list):
+        # Some models return content parts instead of a plain string
+        return "".join(p if isinstance(p, str) else p.get("text", "") for p in content)
+    return content or ""
+
+
+class ModelHealth:
+    def __init__(self):
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.cooldown = COOLDOWN_SECONDS
+        self.probe_in_flight = False
+        self.outcomes = deque(maxlen=WINDOW)    # True / False per call
+        self.latencies = deque(maxlen=WINDOW)   # seconds, successful calls only
+
+    @property
+    def failure_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def latency_percentile(self, pct: float):
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(pct * len(ordered)))]
+
+
+class LLMRouter:
+    """
+    Shared model router for every Gemini call site.
+
+    Tracks per-model failure rate and latency, opens a circuit breaker after
+    repeated failures (half-open probing once the cooldown passes), and tries
+    candidates healthiest-first so a dead model stops costing a timeout per call.
+    """
+
+    def __init__(self):
+        self._health = {}
+        self._lock = threading.Lock()
+
+    # ---------------- public API ----------------
+    def candidates(self, models):
+        """Models worth trying now, healthiest first (caller's order breaks ties)."""
+        now = time.time()
+        ready = []
+        with self._lock:
+            for index, name in enumerate(dict.fromkeys(models)):
+                health = self._health.setdefault(name, ModelHealth())
+                if health.state == OPEN and now - health.opened_at >= health.cooldown:
+                    health.state = HALF_OPEN
+                if health.state == HALF_OPEN and health.probe_in_flight:
+                    continue
+                if health.state == OPEN:
+                    continue
+                ready.append((round(health.failure_rate, 1), index, name))
+        return [name for _, _, name in sorted(ready)]
+
+    def invoke(self, models, messages, temperature=0.5, timeout=30, priority=STANDARD,
+               hedge=False, hedge_delay=None) -> str:
+        """
+        Return the first non-empty response content, or raise AllModelsFailedError.
+        The whole fallback chain holds one admission slot; LLMOverloadedError is
+        raised when the shared limiter sheds the call. Per-call timeouts shrink to
+        fit the request budget (services.deadline) and the chain stops once it is spent.
+
+        With `hedge`, the next candidate is started in parallel when the running
+        call is slower than `hedge_delay` (default: that model's p90 latency) and
+        the first valid answer wins. Hedges only use spare limiter capacity, and
+        every call keeps its slot until it finishes, even after losing the race.
+        """
+        _check_budget()
+        if hedge:
+            limiter.acquire(priority, timeout=deadline.remaining())
+            return self._invoke_hedged(models, messages, temperature, timeout, hedge_delay)
+        with limiter.admit(priority, timeout=deadline.remaining()):
+            return self._invoke(models, messages, temperature, timeout)
+
+    def _invoke(self, models, messages, temperature, timeout) -> str:
+        errors = []
+        for model_name in self.candidates(models):
+            if deadline.expired():
+                errors.append(_BUDGET_SPENT)
+                break
+            if not self._begin(model_name):
+                continue
+            start = time.perf_counter()
+            call_timeout = deadline.clamp_timeout(timeout)
+            try:
+                client = self._get_client(model_name, temperature, call_timeout)
+                response = client.invoke(messages)
+                content = response.content if response else None
+                if not content:
+                    raise ValueError("empty response")
+            except Exception as e:
+                print(f"⚠️ Model {model_name} failed: {e}")
+                self._record_call_failure(model_name, e, call_timeout < timeout)
+                errors.append((model_name, str(e)))
+                continue
+
+            self.record_success(model_name, time.perf_counter() - start)
+            return content
+
+        raise AllModelsFailedError(errors)
+
+    def _invoke_hedged(self, models, messages, temperature, timeout, hedge_delay) -> str:
+        """
+        The caller holds one limiter slot, which goes to the first call. A finished
+        call hands its slot back (reused for the next candidate); once this returns,
+        still-running calls release their own slot when they end.
+        """
+        answers = queue.Queue()
+        handoff = threading.Lock()
+        returned = []
+        spare_slots = 1   # slots held here rather than by a running call
+        errors = []
+        running = 0
+        last_model = None
+
+        def call(model_name):
+            start = time.perf_counter()
+            call_timeout = deadline.clamp_timeout(timeout)
+            try:
+                client = self._get_client(model_name, temperature, call_timeout)
+                response = client.invoke(messages)
+                content = response.content if response else None
+                if not content:
+                    raise ValueError("empty response")
+            except Exception as e:
+                # Losing calls still report, so abandoned hedges keep health accurate
+                self._record_call_failure(model_name, e, call_timeout < timeout)
+                outcome = (model_name, None, e)
+            else:
+                self.record_success(model_name, time.perf_counter() - start)
+                outcome = (model_name, content, None)
+            finally:
+                with handoff:
+                    abandoned = bool(returned)
+                    if not abandoned:
+                        answers.put(outcome)
+                if abandoned:
+                    limiter.release()
+
+        def launch():
+            nonlocal running, last_model, spare_slots
+            while pending:
+                if deadline.expired():
+                    return False
+                model_name = pending.popleft()
+                if self._begin(model_name):
+                    _hedge_pool.submit(contextvars.copy_context().run, call, model_name)
+                    spare_slots -= 1
+                    running += 1
+                    last_model = model_name
+                    return True
+            return False
+
+        try:
+            pending = deque(self.candidates(models))
+            launch()
+            while running:
+                wait = deadline.remaining()
+                if pending:
+                    delay = hedge_delay
+                    if delay is None:
+                        delay = self.latency_percentile(last_model, HEDGE_PERCENTILE) or HEDGE_DEFAULT_DELAY
+                    wait = min(wait, delay)
+                try:
+                    model_name, content, error = answers.get(timeout=None if wait == math.inf else wait)
+                except queue.Empty:
+                    if deadline.expired():
+                        break
+                    # Running call is slow: hedge with the next candidate if there is room
+                    if limiter.try_acquire():
+                        spare_slots += 1
+                        if not launch():
+                            spare_slots -= 1
+                            limiter.release()
+                    continue
+
+                running -= 1
+                spare_slots += 1
+                if error is None:
+                    return content
+                print(f"⚠️ Model {model_name} failed: {error}")
+                errors.append((model_name, str(error)))
+                if not running:
+                    launch()
+
+            if deadline.expired():
+                errors.append(_BUDGET_SPENT)
+            raise AllModelsFailedError(errors)
+        finally:
+            with handoff:
+                returned.append(True)
+            # Calls that finished after the last answers.get() handed their slot here too
+            spare_slots += answers.qsize()
+            for _ in range(spare_slots):
+                limiter.release()
+
+    def stream(self, models, messages, temperature=0.5, timeout=30, priority=STANDARD):
+        """
+        Streaming counterpart of invoke(). Models are tried in the same order until
+        one yields its first non-empty chunk; that happens before this returns, so
+        AllModelsFailedError is raised eagerly. Returns a generator of text chunks
+        that keeps its admission slot until it is exhausted or closed.
+        """
+        _check_budget()
+        limiter.acquire(priority, timeout=deadline.remaining())
+        release = _once(limiter.release)
+        try:
+            chunks = self._stream(models, messages, temperature, timeout, release)
+        except BaseException:
+            release()
+            raise
+        # Also covers a generator that is dropped before its first next()
+        weakref.finalize(chunks, release)
+        return chunks
+
+    def _stream(self, models, messages, temperature, timeout, release):
+        errors = []
+        for model_name in self.candidates(models):
+            if deadline.expired():
+                errors.append(_BUDGET_SPENT)
+                break
+            if not self._begin(model_name):
+                continue
+            start = time.perf_counter()
+            call_timeout = deadline.clamp_timeout(timeout)
+            try:
+                client = self._get_client(model_name, temperature, call_timeout)
+                chunks = iter(client.stream(messages))
+                first = next(text for text in map(_chunk_text, chunks) if text)
+            except StopIteration:
+                self.record_failure(model_name, "empty response")
+                errors.append((model_name, "empty response"))
+                continue
+            except Exception as e:
+                print(f"⚠️ Model {model_name} failed: {e}")
+                self._record_call_failure(model_name, e, call_timeout < timeout)
+                errors.append((model_name, str(e)))
+                continue
+
+            return self._relay(model_name, start, first, chunks, release, call_timeout < timeout)
+
+        raise AllModelsFailedError(errors)
+
+    def _relay(self, model_name, start, first, chunks, release, clamped=False):
+        try:
+            yield first
+            for chunk in chunks:
+                text = _chunk_text(chunk)
+                if text:
+                    yield text
+        except Exception as e:
+            # Past the first token there is no falling back; surface the error
+            self._record_call_failure(model_name, e, clamped)
+            raise
+        else:
+            self.record_success(model_name, time.perf_counter() - start)
+        finally:
+            # A client disconnect (GeneratorExit) records neither outcome; free the probe slot anyway
+            self._end_probe(model_name)
+            release()
+
+    def record_success(self, model_name, latency):
+        with self._lock:
+            health = self._health.setdefault(model_name, ModelHealth())
+            health.outcomes.append(True)
+            health.latencies.append(latency)
+            health.consecutive_failures = 0
+            health.probe_in_flight = False
+            health.state = CLOSED
+            health.cooldown = COOLDOWN_SECONDS
+
+    def record_failure(self, model_name, error):
+        message = str(error)
+        with self._lock:
+            health = self._health.setdefault(model_name, ModelHealth())
+            health.outcomes.append(False)
+            health.consecutive_failures += 1
+            health.probe_in_flight = False
+
+            dead = "NOT_FOUND" in message or "404" in message
+            if dead or health.state == HALF_OPEN or health.consecutive_failures >= FAILURE_THRESHOLD:
+                health.state = OPEN
+                health.opened_at = time.time()
+                health.cooldown = DEAD_MODEL_COOLDOWN if dead else COOLDOWN_SECONDS
+
+    def latency_percentile(self, model_name, pct):
+        with self._lock:
+            health = self._health.get(model_name)
+            return health.latency_percentile(pct) if health else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                name: {
+                    "state": h.state,
+                    "failure_rate": round(h.failure_rate, 3),
+                    "consecutive_failures": h.consecutive_failures,
+                    "p50_latency": h.latency_percentile(0.5),
+                    "p90_latency": h.latency_percentile(0.9),
+                    "calls": len(h.outcomes),
+                }
+                for name, h in self._health.items()
+            }
+
+    # ---------------- internals ----------------
+    def _begin(self, model_name) -> bool:
+        """Claim the single half-open probe slot; closed models always pass."""
+        with self._lock:
+            health = self._health.setdefault(model_name, ModelHealth())
+            if health.state == OPEN:
+                return False
+            if health.state == HALF_OPEN:
+                if health.probe_in_flight:
+                    return False
+                health.probe_in_flight = True
+            return True
+
+    def _record_call_failure(self, model_name, error, clamped):
+        """
+        record_failure(), except for a timeout on a call whose timeout was cut
+        to the request budget: the model was not given its full time, so its
+        health is left alone (only a claimed probe slot is freed).
+        """
+        if clamped and _is_timeout(error):
+            self._end_probe(model_name)
+            return
+        self.record_failure(model_name, error)
+
+    def _end_probe(self, model_name):
+        with self._lock:
+            health = self._health.get(model_name)
+            if health:
+                health.probe_in_flight = False
+
+    def _get_client(self, model_name, temperature, timeout):
+        return get_client(model_name, temperature, timeout)
+
+
+# One router per process so every call site shares the same health view
+router = LLMRouter()
@@ -0,0 +1,97 @@
+import re
+import threading
+import unicodedata
+
+from rapidfuzz import fuzz, process
+
+from services.cache import TTLCache
+
+
+def normalize_question(text: str) -> str:
+    """
+    Lowercase, replace punctuation and symbols with spaces, collapse spaces.
+    Letters, digits and combining marks (Devanagari matras) are kept, so
+    "दाल" and "दिल" stay different.
+    """
+    text = "".join(" " if unicodedata.category(ch)[0] in "PS" else ch for ch in text.lower())
+    return " ".join(text.split())
+
+
+ANCHOR_WORD_LENGTH = 4   # words this short change meaning with one letter ("दाल"/"दिल", "dal"/"dil")
+
+
+def _anchors(text: str) -> list:
+    """Numbers and short words, which a fuzzy match must reproduce exactly."""
+    return sorted(word for word in text.split() if len(word) <= ANCHOR_WORD_LENGTH or re.search(r"\d", word))
+
+
+class QuestionCache:
+    """
+    Answer cache for FAQ-style chat questions.
+
+    Questions are normalized first; an exact normalized match is a plain dict hit,
+    otherwise the closest cached question scoring at least `threshold`
+    (rapidfuzz ratio, 0-100) with the same numbers and short words is reused,
+    so "10 rupee item" never answers "20 rupee item" and "दिल" never answers
+    "दाल". Bounded LRU with TTL; every entry keeps its own hit counter.
+    """
+
+    def __init__(self, maxsize=500, ttl=24 * 3600, threshold=92, min_length=8):
+        self.threshold = threshold
+        self.min_length = min_length
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl, name="question_cache")
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+
+    def get(self, question: str):
+        key = normalize_question(question)
+        entry = self._cache.get(key)
+        fuzzy = False
+
+        if entry is None and len(key) >= self.min_length:
+            anchors = _anchors(key)
+            matches = process.extract(
+                key, self._cache.keys(), scorer=fuzz.ratio, score_cutoff=self.threshold, limit=5
+            )
+            for candidate, _, _ in matches:
+                if _anchors(candidate) == anchors:
+                    entry = self._cache.get(candidate)
+                    fuzzy = entry is not None
+                    break
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            entry["hits"] += 1
+            if fuzzy:
+                self.fuzzy_hits += 1
+            else:
+                self.exact_hits += 1
+            return entry["answer"]
+
+    def set(self, question: str, answer: str):
+        key = normalize_question(question)
+        if key:
+            self._cache.set(key, {"question": question, "answer": answer, "hits": 0})
+
+    def stats(self, top=10) -> dict:
+        entries = self._cache.items()
+        with self._lock:
+            lookups = self.exact_hits + self.fuzzy_hits + self.misses
+            popular = sorted(
+                ({"question": e["question"], "hits": e["hits"]} for _, e in entries if e),
+                key=lambda e: e["hits"], reverse=True
+            )[:top]
+            return {
+                "size": len(entries),
+                "maxsize": self._cache.maxsize,
+                "exact_hits": self.exact_hits,
+                "fuzzy_hits": self.fuzzy_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.exact_hits + self.fuzzy_hits) / lookups, 3) if lookups else 0.0,
+                "evictions": self._cache.evictions,
+                "top_questions": popular,
+            }
@@ -0,0 +1,74 @@
+import os
+import time
+import threading
+
+
+class ReloadingFileIndex:
+    """
+    An in-memory index built from a file and rebuilt when the file's mtime changes.
+
+    `build(path)` returns the index object. The first build runs in the
+    constructor; later rebuilds run on a background thread while readers keep
+    getting the old index, which the new object then replaces in a single
+    assignment, so readers always see a complete index and nothing is mutated
+    under them. The file is stat()ed at most once every `check_interval` seconds.
+    """
+
+    def __init__(self, path, build, default=None, check_interval=5.0, name=None):
+        self.path = path
+        self.build = build
+        self.check_interval = check_interval
+        self.name = name or os.path.basename(path)
+
+        self._index = default
+        self._mtime = None
+        self._checked_at = 0.0
+        self._rebuilding = False
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+        mtime = self._changed_mtime(force=True)
+        if mtime is not None:
+            self._rebuild(mtime)
+
+    def get(self):
+        if time.time() - self._checked_at >= self.check_interval:
+            mtime = self._changed_mtime()
+            if mtime is not None:
+                threading.Thread(
+                    target=self._rebuild, args=(mtime,), name=f"reload-{self.name}", daemon=True
+                ).start()
+        return self._index
+
+    def _changed_mtime(self, force=False):
+        """The file's new mtime if a rebuild should start now (and claim it), else None."""
+        with self._lock:
+            if not force and time.time() - self._checked_at < self.check_interval:
+                return None  # another thread just checked
+            self._checked_at = time.time()
+            if self._rebuilding:
+                return None
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                return None
+            if mtime == self._mtime:
+                return None
+            self._rebuilding = True
+            return mtime
+
+    def _rebuild(self, mtime):
+        try:
+            index = self.build(self.path)
+        except Exception as e:
+            # _mtime is left as is, so the next check retries
+            print(f"⚠️ Could not load {self.name}: {e}")
+            with self._lock:
+                self._rebuilding = False
+            return
+
+        with self._lock:
+            self._index = index
+            self._mtime = mtime
+            self._rebuilding = False
+            self.reloads += 1
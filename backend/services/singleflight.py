@@ -0,0 +1,75 @@
+import math
+import threading
+
+from services import deadline
+
+# name -> SingleFlight, for the metrics endpoint
+_groups = {}
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller runs the
+    function, later callers block until it finishes and receive the same
+    result (or exception). Nothing is cached once the call completes.
+    Followers stop waiting when their own request budget runs out.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.collapsed = 0
+        _groups[name] = self
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.collapsed += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            left = deadline.remaining()
+            if not call.done.wait(None if left == math.inf else left):
+                raise deadline.DeadlineExceededError(f"{self.name}: budget spent waiting for an in-flight call")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.executed + self.collapsed
+            return {
+                "executed": self.executed,
+                "collapsed": self.collapsed,
+                "in_flight": len(self._calls),
+                "collapse_rate": round(self.collapsed / total, 3) if total else 0.0,
+            }
+
+
+def all_stats() -> dict:
+    return {name: group.stats() for name, group in list(_groups.items())}
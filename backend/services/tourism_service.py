@@ -0,0 +1,374 @@
+import os
+import sys
+import time
+import argparse
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed, wait
+
+from services import deadline
+from services import calendar_service, weather_service, data_service, ai_service
+from services.cache import TTLCache
+from services.singleflight import SingleFlight
+
+# --------------------------------------------------
+# ⚡ Tourism insight pipeline
+# --------------------------------------------------
+# Calendar, weather and places are fetched concurrently. The AI step only
+# needs weather + places (the season comes from the month), so it starts as
+# soon as those two are in, while the calendar may still be loading. A source
+# that misses the stage deadline is reported in "Partial_Sources" instead of
+# blocking the response.
+STAGE_DEADLINE = float(os.getenv("TOURISM_STAGE_DEADLINE_SECONDS", "6"))
+UPCOMING_DAYS = 30
+AI_UNAVAILABLE = "AI Insights unavailable at the moment. Please consult local guides."
+
+_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("TOURISM_WORKERS", "16")),
+    thread_name_prefix="tourism"
+)
+
+
+class StageTimings:
+    """Wall-clock milliseconds per stage, rendered as a Server-Timing header."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def run(self, name, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self.stages[name] = (time.perf_counter() - start) * 1000
+
+    def header(self, partial=()) -> str:
+        with self._lock:
+            parts = [f"{name};dur={ms:.1f}" for name, ms in self.stages.items()]
+        parts += [f'{name};desc="partial"' for name in partial]
+        parts.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+def _result_by(future, deadline_at, default):
+    """future.result() bounded by a time.monotonic() deadline; (value, ok)."""
+    try:
+        return future.result(timeout=max(0.0, deadline_at - time.monotonic())), True
+    except FutureTimeoutError:
+        future.cancel()
+        return default, False
+    except Exception as e:
+        print(f"⚠️ Tourism stage failed: {e}")
+        return default, False
+
+
+def upcoming_events(event_dates: dict, check_date: datetime, days=UPCOMING_DAYS):
+    events = []
+    for date_str, event_name in event_dates.items():
+        try:
+            delta = (datetime.strptime(date_str, "%Y-%m-%d") - check_date).days
+        except ValueError:
+            continue
+        if 0 <= delta <= days:
+            events.append({"date": date_str, "event": event_name, "days_away": delta})
+    events.sort(key=lambda x: x["days_away"])
+    return events
+
+
+def build_tourism_insights(city: str, state: str, check_date: datetime):
+    """
+    Returns (insights, timings). `insights` is None when the dataset has no
+    places for the city; otherwise it carries "Partial_Sources" listing any
+    stage that timed out or failed.
+    """
+    timings = StageTimings()
+    stage_deadline = time.monotonic() + min(STAGE_DEADLINE, deadline.remaining())
+    date_str = check_date.strftime("%Y-%m-%d")
+
+    calendar_job = deadline.submit(
+        _pool, timings.run, "calendar", calendar_service.get_calendar_events,
+        datetime(check_date.year, 1, 1), datetime(check_date.year, 12, 31)
+    )
+    weather_job = deadline.submit(_pool, timings.run, "weather", weather_service.get_weather, city, date_str)
+    places_job = deadline.submit(_pool, timings.run, "places", data_service.get_top_places, city, state)
+
+    partial = []
+    top_places, ok = _result_by(places_job, stage_deadline, [])
+    if not ok:
+        partial.append("places")
+    elif not top_places:
+        return None, timings
+
+    weather_info, ok = _result_by(weather_job, stage_deadline, dict(weather_service.UNAVAILABLE))
+    if not ok or weather_info == weather_service.UNAVAILABLE:
+        partial.append("weather")
+
+    insights = {
+        "City": city,
+        "State": state,
+        "Date": date_str,
+        "Season": calendar_service.season_for(check_date),
+        **weather_info,
+        "Top_Tourist_Spots": top_places,
+    }
+    # Inputs are ready: start the AI while the calendar may still be loading
+    ai_job = deadline.submit(_pool, timings.run, "ai", ai_service.generate_vendor_insights, dict(insights))
+
+    event_dates, ok = _result_by(calendar_job, stage_deadline, {})
+    if not ok:
+        partial.append("calendar")
+    insights.update(calendar_service.generate_calendar_flags(check_date, event_dates))
+    insights["Upcoming_Events"] = upcoming_events(event_dates, check_date)
+
+    # The AI step is bounded by the request budget (its router calls are too)
+    ai_text, ok = _result_by(ai_job, time.monotonic() + min(deadline.remaining(), 3600), AI_UNAVAILABLE)
+    if not ok:
+        partial.append("ai")
+    insights["AI_Insights"] = ai_text
+    insights["Partial_Sources"] = partial
+    return insights, timings
+
+
+# --------------------------------------------------
+# 🗄️ Response cache
+# --------------------------------------------------
+# The payload for a (city, state, date) is the same for every vendor, so whole
+# responses are cached. Concurrent misses for one key share a single build.
+# Degraded answers (partial sources or an AI fallback) are kept only briefly.
+CACHE_TTL = int(os.getenv("TOURISM_CACHE_TTL_HOURS", "12")) * 3600
+DEGRADED_TTL = 60
+
+tourism_cache = TTLCache(
+    maxsize=int(os.getenv("TOURISM_CACHE_SIZE", "2000")),
+    ttl=CACHE_TTL,
+    path=os.getenv("TOURISM_CACHE_PATH"),  # optional: share a warm cache with the CLI precompute
+    name="tourism_cache"
+)
+tourism_flight = SingleFlight("tourism")
+
+
+def _cache_key(city: str, state: str, check_date: datetime) -> str:
+    return "|".join([data_service.normalize_name(city), data_service.normalize_name(state),
+                     check_date.strftime("%Y-%m-%d")])
+
+
+def _is_degraded(insights: dict) -> bool:
+    # Every ai_service fallback message starts with "AI Insights"
+    return bool(insights["Partial_Sources"]) or insights["AI_Insights"].startswith("AI Insights")
+
+
+def _build_and_cache(key, city, state, check_date):
+    insights, timings = build_tourism_insights(city, state, check_date)
+    if insights is not None:
+        tourism_cache.set(key, insights, ttl=DEGRADED_TTL if _is_degraded(insights) else None)
+    return insights, timings
+
+
+def get_tourism_insights(city: str, state: str, check_date: datetime, refresh=False):
+    """
+    Cached build_tourism_insights(). Returns (insights, timings, cache_hit);
+    `refresh` rebuilds even when a cached answer exists. Raises
+    DeadlineExceededError when the request budget runs out while waiting for
+    another caller's build of the same key.
+    """
+    key = _cache_key(city, state, check_date)
+    if not refresh:
+        cached = tourism_cache.get(key)
+        if cached is not None:
+            return dict(cached), StageTimings(), True
+
+    insights, timings = tourism_flight.do(key, _build_and_cache, key, city, state, check_date)
+    return (dict(insights) if insights is not None else None), timings, False
+
+
+# --------------------------------------------------
+# 📦 Batch planning
+# --------------------------------------------------
+# Items run on their own pool: each one waits on stage jobs in _pool, so
+# sharing that pool could deadlock once it is full.
+MAX_BATCH_ITEMS = int(os.getenv("TOURISM_MAX_BATCH_ITEMS", "100"))
+_batch_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("TOURISM_BATCH_WORKERS", "8")),
+    thread_name_prefix="tourism-batch"
+)
+
+
+def _date_windows(dates, max_days=weather_service.MAX_RANGE_DAYS):
+    """Split sorted dates into (start, end) windows no longer than max_days."""
+    windows = []
+    for day in dates:
+        if windows and (day - windows[-1][0]).days < max_days:
+            windows[-1][1] = day
+        else:
+            windows.append([day, day])
+    return windows
+
+
+def prefetch_shared(items):
+    """
+    Load the work shared by batch items once: one calendar fetch per year and
+    one weather range call per city window. The per-item builds then hit the
+    calendar index and weather caches. Places are in-memory dict lookups already.
+    Cities are grouped by normalized name, so "Jaipur" and " jaipur" share a fetch.
+    """
+    years = {check_date.year for _, _, check_date in items}
+    dates_by_city = {}
+    for city, _, check_date in items:
+        dates_by_city.setdefault(data_service.normalize_name(city), set()).add(check_date)
+
+    jobs = [deadline.submit(_pool, calendar_service.calendar_index.events_for_year, year) for year in years]
+    for city, dates in dates_by_city.items():
+        for start, end in _date_windows(sorted(dates)):
+            jobs.append(deadline.submit(_pool, weather_service.get_weather_range, city, start, end))
+
+    wait(jobs, timeout=min(STAGE_DEADLINE, deadline.remaining()))
+
+
+def iter_batch(items):
+    """
+    Yield (index, insights, error) for [(city, state, datetime)] as each item
+    completes, after prefetching the shared calendar and weather work.
+    `insights` is None when the city has no places or the item failed.
+    """
+    prefetch_shared(items)
+    futures = {
+        deadline.submit(_batch_pool, get_tourism_insights, city, state, check_date): index
+        for index, (city, state, check_date) in enumerate(items)
+    }
+    for future in as_completed(futures):
+        try:
+            insights, _, _ = future.result()
+        except Exception as e:
+            print(f"⚠️ Batch tourism item failed: {e}")
+            yield futures[future], None, str(e)
+            continue
+        yield futures[future], insights, None
+
+
+# --------------------------------------------------
+# 🌙 Precompute job
+# --------------------------------------------------
+PRECOMPUTE_CITIES = int(os.getenv("TOURISM_PRECOMPUTE_CITIES", "20"))
+PRECOMPUTE_DAYS = int(os.getenv("TOURISM_PRECOMPUTE_DAYS", "7"))
+PRECOMPUTE_WORKERS = int(os.getenv("TOURISM_PRECOMPUTE_WORKERS", "4"))
+# Each build runs under the interactive budget, so a request that joins a
+# precompute build in flight never waits longer than it would for its own
+PRECOMPUTE_BUDGET = deadline.budget_from_env(
+    "TOURISM_PRECOMPUTE_BUDGET_S", deadline.budget_from_env("TOURISM_BUDGET_S", 25)
+)
+PRECOMPUTE_LOCK = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               "data", "tourism_precompute.lock")
+# Re-run as entries expire so the next days stay warm
+PRECOMPUTE_INTERVAL = float(os.getenv("TOURISM_PRECOMPUTE_INTERVAL_HOURS", str(CACHE_TTL / 3600))) * 3600
+
+precompute_status = {"runs": 0, "last_started": None, "last_seconds": None, "last_built": 0, "last_failed": 0}
+_precompute_lock = threading.Lock()
+
+
+def precompute(cities=PRECOMPUTE_CITIES, days=PRECOMPUTE_DAYS, workers=PRECOMPUTE_WORKERS):
+    """Rebuild cached responses for the top `cities` over the next `days` days."""
+    if not _precompute_lock.acquire(blocking=False):
+        return precompute_status  # a run is already in progress
+
+    try:
+        start = time.perf_counter()
+        precompute_status["last_started"] = datetime.now().isoformat(timespec="seconds")
+        today = datetime.combine(datetime.today().date(), datetime.min.time())
+        jobs = [(city, state, today + timedelta(days=offset))
+                for city, state in data_service.get_top_cities(cities) for offset in range(days)]
+
+        def warm(job):
+            try:
+                with deadline.budget(PRECOMPUTE_BUDGET):
+                    insights, _, _ = get_tourism_insights(*job, refresh=True)
+            except deadline.DeadlineExceededError:
+                return False
+            return insights is not None
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tourism-precompute") as pool:
+            outcomes = list(pool.map(warm, jobs))
+
+        precompute_status.update(
+            runs=precompute_status["runs"] + 1,
+            last_seconds=round(time.perf_counter() - start, 1),
+            last_built=sum(outcomes),
+            last_failed=len(outcomes) - sum(outcomes),
+        )
+        print(f"🌙 Tourism precompute: {sum(outcomes)}/{len(outcomes)} responses in {precompute_status['last_seconds']}s")
+        return precompute_status
+    finally:
+        _precompute_lock.release()
+
+
+_scheduler_lock = None
+
+
+def _claim_scheduler_lock(path=PRECOMPUTE_LOCK) -> bool:
+    """True in the one process on this host that holds the precompute lock file."""
+    global _scheduler_lock
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handle = open(path, "a+")
+    except OSError as e:
+        print(f"⚠️ Could not open the precompute lock: {e}")
+        return False
+    try:
+        if os.name == "nt":
+            import msvcrt
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return False
+    _scheduler_lock = handle  # kept open: the lock is held for the life of the process
+    return True
+
+
+def start_precompute_scheduler(interval=PRECOMPUTE_INTERVAL):
+    """
+    Run precompute() now and then every `interval` seconds on a daemon thread.
+    With several WSGI workers only the first to claim the lock file runs it;
+    set TOURISM_CACHE_PATH so the other workers read the warmed cache.
+    Returns the thread, or None when another worker owns the schedule.
+    """
+    if not _claim_scheduler_lock():
+        print("🌙 Tourism precompute is scheduled by another worker")
+        return None
+
+    def loop():
+        while True:
+            try:
+                precompute()
+            except Exception as e:
+                print(f"⚠️ Tourism precompute failed: {e}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name="tourism-precompute", daemon=True)
+    thread.start()
+    return thread
+
+
+def stats() -> dict:
+    return {"cache": tourism_cache.stats(), "precompute": dict(precompute_status)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Warm the tourism response cache for the top cities.")
+    parser.add_argument("--cities", type=int, default=PRECOMPUTE_CITIES)
+    parser.add_argument("--days", type=int, default=PRECOMPUTE_DAYS)
+    parser.add_argument("--workers", type=int, default=PRECOMPUTE_WORKERS)
+    args = parser.parse_args(argv)
+
+    if not os.getenv("TOURISM_CACHE_PATH"):
+        print("⚠️ TOURISM_CACHE_PATH is not set; the warmed cache only lives in this process")
+    precompute(args.cities, args.days, args.workers)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,132 @@
+import os
+from datetime import datetime, date as date_type, timedelta
+from urllib.parse import quote
+
 import requests
+from requests.adapters import HTTPAdapter
+
 from config import WEATHER_API_KEY
+from services import deadline
+from services.cache import TTLCache
+from services.singleflight import SingleFlight
 
-def get_weather(city: str, date: str):
-    url = f"https://weather.visualcrossing.com/VisualCrossingWebServices/rest/services/timeline/{city}/{date}?unitGroup=metric&key={WEATHER_API_KEY}&include=days"
+TIMELINE_URL = "https://weather.visualcrossing.com/VisualCrossingWebServices/rest/services/timeline"
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# --------------------------------------------------
+# 🌐 Pooled HTTP session with strict timeouts
+# --------------------------------------------------
+CONNECT_TIMEOUT = float(os.getenv("WEATHER_CONNECT_TIMEOUT_SECONDS", "3"))
+READ_TIMEOUT = float(os.getenv("WEATHER_READ_TIMEOUT_SECONDS", "5"))
+MAX_RANGE_DAYS = 31
+
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=int(os.getenv("WEATHER_POOL_SIZE", "16"))))
+
+# --------------------------------------------------
+# 🗄️ Caches: past days never change, forecasts do
+# --------------------------------------------------
+# Historical days are written through to SQLite and effectively never expire;
+# today and future days stay in memory for WEATHER_FORECAST_TTL_MINUTES.
+historical_cache = TTLCache(
+    maxsize=4096,
+    ttl=10 * 365 * 24 * 3600,
+    path=os.getenv("WEATHER_CACHE_PATH", os.path.join(BASE_DIR, "data", "weather_cache.sqlite3")),
+    name="weather_historical"
+)
+forecast_cache = TTLCache(
+    maxsize=1024,
+    ttl=int(os.getenv("WEATHER_FORECAST_TTL_MINUTES", "180")) * 60,
+    name="weather_forecast"
+)
+FAILURE_TTL = 60  # a failed lookup is not retried for a minute
+
+weather_flight = SingleFlight("weather")
+
+UNAVAILABLE = {"Temp(°C)": "N/A", "Conditions": "N/A"}
+
+
+def _cache_for(day: str):
+    return historical_cache if day < date_type.today().isoformat() else forecast_cache
+
+
+def _key(city: str, day: str) -> str:
+    # Same normalization as data_service.normalize_name, so batch prefetches by normalized city hit
+    return f"{' '.join(city.lower().split())}|{day}"
+
+
+def _fetch_timeline(city: str, start: str, end: str = None):
+    """Visual Crossing timeline days for start..end, or None on any failure."""
+    path = f"{quote(city.strip())}/{start}" + (f"/{end}" if end else "")
+    read_timeout = min(READ_TIMEOUT, deadline.remaining())
+    if read_timeout <= 0:
+        return None
     try:
-        r = requests.get(url)
+        r = _session.get(
+            f"{TIMELINE_URL}/{path}",
+            params={"unitGroup": "metric", "key": WEATHER_API_KEY, "include": "days"},
+            timeout=(CONNECT_TIMEOUT, read_timeout)
+        )
         data = r.json()
         if "days" in data:
-            day = data["days"][0]
-            return {"Temp(°C)": day.get("temp", "N/A"), "Conditions": day.get("conditions", "N/A")}
+            return data["days"]
     except Exception as e:
         print("⚠️ Weather error:", e)
-    return {"Temp(°C)": "N/A", "Conditions": "N/A"}
+    return None
+
+
+def _store_days(city: str, days):
+    result = {}
+    for day in days:
+        entry = {"Temp(°C)": day.get("temp", "N/A"), "Conditions": day.get("conditions", "N/A")}
+        day_str = day.get("datetime", "")
+        _cache_for(day_str).set(_key(city, day_str), entry)
+        result[day_str] = entry
+    return result
+
+
+def _load_day(city: str, date: str):
+    days = _fetch_timeline(city, date)
+    if not days:
+        forecast_cache.set(_key(city, date), UNAVAILABLE, ttl=FAILURE_TTL)
+        return dict(UNAVAILABLE)
+    return _store_days(city, days[:1]).get(days[0].get("datetime", date), dict(UNAVAILABLE))
+
+
+def get_weather(city: str, date: str):
+    key = _key(city, date)
+    cache = _cache_for(date)
+    cached = cache.get(key)
+    if cached is None and cache is historical_cache:
+        cached = forecast_cache.get(key)  # recent failure, or cached as a forecast yesterday
+    if cached is not None:
+        return dict(cached)
+    return dict(weather_flight.do(key, _load_day, city, date))
+
+
+def get_weather_range(city: str, start_date: datetime, end_date: datetime):
+    """
+    {"YYYY-MM-DD": weather} for every day from start_date to end_date inclusive
+    (at most MAX_RANGE_DAYS). Cached days are reused; the rest come from one
+    timeline call.
+    """
+    count = (end_date - start_date).days + 1
+    if count <= 0:
+        return {}
+    if count > MAX_RANGE_DAYS:
+        raise ValueError(f"Date range is limited to {MAX_RANGE_DAYS} days")
+
+    days = [(start_date + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(count)]
+    result = {}
+    for day in days:
+        cached = _cache_for(day).get(_key(city, day))
+        if cached is not None:
+            result[day] = dict(cached)
+
+    missing = [day for day in days if day not in result]
+    if missing:
+        fetched = _fetch_timeline(city, missing[0], missing[-1]) or []
+        stored = _store_days(city, fetched)
+        for day in missing:
+            result[day] = stored.get(day, dict(UNAVAILABLE))
+    return result